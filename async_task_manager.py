@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from task_manager import OutputLine
+
+# 输出事件：
+#   {"type": "status", "task": 任务名, "status": "task_status.xxx"}
+#   {"type": "log", "task": 任务名, "message": 文本}
+#   {"type": "output", "task": 任务名, "stream": "stdout"/"stderr", "line": 文本, "time": 时间戳}
+#   {"type": "exit", "task": 任务名, "return_code": 退出码}
+
+class AsyncTaskManager:
+    """TaskManager 的 asyncio 接口
+
+    任务由 TaskManager 的执行核心在共享线程池中执行（与回调接口相同的指令解析、
+    聚合任务、会话、结果缓存、超时、取消、执行历史、指标和时间线），同时执行的
+    任务数受 max_workers 限制，子进程输出由同一个输出反应器线程读取。执行期间的
+    状态和输出通过 loop.call_soon_threadsafe 转换为事件投递回事件循环。await run_task
+    返回退出码，async for stream_task 逐条获得输出事件，取消协程会取消任务并
+    终止其子进程；任务同样可以通过 TaskManager.cancel_task 取消。
+    """
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self.language_manager = task_manager.language_manager
+        self.loop = None
+        self.loop_thread = None
+        self.loop_lock = threading.Lock()
+
+    def _text(self, key, *args):
+        return self.language_manager.get_text(key).format(*args)
+
+    async def run_task(self, task_name, on_event=None, timeout=None):
+        """运行单个任务并返回退出码；任务不存在或已在执行中时返回 None
+
+        on_event(event) 在事件循环线程中接收输出事件，timeout 为超时秒数
+        （任务自身设置的 timeout 优先），超时后结束任务的全部子进程。
+        """
+        emit = on_event or (lambda event: None)
+        tm = self.task_manager
+
+        task = tm.tasks.get(task_name)
+        if not task:
+            emit({"type": "log", "task": task_name, "message": self._text("messages.task_not_exist", task_name)})
+            return None
+        if task_name in tm.running_tasks:
+            emit({"type": "log", "task": task_name, "message": self._text("messages.task_running", task_name)})
+            return None
+
+        loop = asyncio.get_running_loop()
+
+        def post(event):
+            try:
+                loop.call_soon_threadsafe(emit, event)
+            except RuntimeError:
+                # 事件循环已关闭，不再投递事件
+                pass
+
+        def status_callback(name, status):
+            post({"type": "status", "task": name, "status": status})
+
+        def log_callback(message):
+            if isinstance(message, OutputLine):
+                post({"type": "output", "task": task_name, "stream": message.stream,
+                      "line": message.line, "time": message.time})
+            else:
+                post({"type": "log", "task": task_name, "message": message})
+
+        # 在共享线程池中执行，同时执行的任务数受 max_workers 限制；排队期间同样可以取消
+        tm._queue_tasks([task_name])
+        execution = asyncio.wrap_future(tm._submit(tm._execute_task, task, status_callback, log_callback, timeout))
+
+        try:
+            return_code = await asyncio.shield(execution)
+        except asyncio.CancelledError:
+            # 取消协程时结束任务的子进程，并等待执行记录写完后再向上传递取消
+            tm.cancel_task(task_name)
+            return_code = await asyncio.shield(execution)
+            emit({"type": "exit", "task": task_name, "return_code": return_code})
+            raise
+
+        if return_code is None:
+            emit({"type": "log", "task": task_name, "message": self._text("messages.task_running", task_name)})
+            return None
+        emit({"type": "exit", "task": task_name, "return_code": return_code})
+        return return_code
+
+    async def stream_task(self, task_name):
+        """运行任务，以异步迭代器逐条返回输出事件，最后一个事件类型为 exit
+
+        提前结束迭代时取消任务。
+        """
+        queue = asyncio.Queue()
+        runner = asyncio.ensure_future(self.run_task(task_name, queue.put_nowait))
+        runner.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+
+    async def run_tasks(self, task_names, on_event=None, max_parallel=None, timeout=None):
+        """并发运行多个任务，max_parallel 限制同时执行的任务数，返回 {任务名: 退出码}"""
+        slots = asyncio.Semaphore(max(1, max_parallel or self.task_manager.max_workers))
+
+        async def run_one(task_name):
+            async with slots:
+                return await self.run_task(task_name, on_event, timeout)
+
+        return_codes = await asyncio.gather(*(run_one(task_name) for task_name in task_names))
+        return dict(zip(task_names, return_codes))
+
+    def _get_loop(self):
+        """获取（必要时启动）后台事件循环线程"""
+        with self.loop_lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, name="async-task-loop")
+                self.loop_thread.daemon = True
+                self.loop_thread.start()
+            return self.loop
+
+    def run_task_threadsafe(self, task_name, status_callback, log_callback):
+        """以回调方式在后台事件循环中运行任务
+
+        回调参数与 TaskManager.run_task 相同，返回 concurrent.futures.Future，
+        对其调用 cancel() 会取消任务并终止子进程。
+        """
+        error_format = self.language_manager.get_formatter("messages.error")
+
+        def on_event(event):
+            if event["type"] == "status":
+                status_callback(event["task"], event["status"])
+            elif event["type"] == "log":
+                log_callback(event["message"])
+            elif event["type"] == "output":
+                log_callback(event["line"] if event["stream"] == 'stdout' else error_format(event["line"]))
+
+        return asyncio.run_coroutine_threadsafe(self.run_task(task_name, on_event), self._get_loop())
+
+    def close(self):
+        """停止后台事件循环"""
+        with self.loop_lock:
+            loop, self.loop = self.loop, None
+        if loop:
+            loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,278 @@
+"""性能基准测试：生成合成任务库，测量存储、执行引擎、输出捕获、日志、翻译和任务列表的耗时
+
+    python benchmark.py [--sizes 1000,10000,100000] [--repeat 3] [--output results.json]
+    python benchmark.py --compare old.json new.json
+
+结果为 JSON，每项记录多次运行中的最小值和中位数，可保存后与其他提交的结果比较。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from data_manager import DataManager
+from sqlite_data_manager import SqliteDataManager
+from language_manager import LanguageManager
+from log_manager import LogManager
+from task_manager import TaskManager
+from virtual_task_list import VirtualTaskList
+
+def make_tasks(count):
+    """生成合成任务库，其中每 20 个任务有一个聚合任务"""
+    tasks = {}
+    for i in range(count):
+        name = f"task-{i:06d}"
+        if i % 20 == 19:
+            steps = [f"task-{j:06d}" for j in range(i - 3, i)]
+            tasks[name] = {
+                "name": name,
+                "command": " && ".join(tasks[step]["command"] for step in steps),
+                "steps": [{"task": step, "command": tasks[step]["command"], "depends_on": []} for step in steps]
+            }
+        else:
+            tasks[name] = {"name": name, "command": f"echo build module {i} --target out/{i % 97}", "frequent": i % 50 == 0}
+    return tasks
+
+def measure(func, repeat):
+    """运行 repeat 次，返回每次耗时（秒）的最小值和中位数"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times)}
+
+class _HeadlessTree:
+    """不依赖显示环境的 Treeview 替身，只实现 VirtualTaskList 用到的方法，用于测量列表模型的开销"""
+    def __init__(self, height=30):
+        self.height = height
+        self.items = {}
+        self.order = []
+        self.counter = 0
+
+    def cget(self, option):
+        return self.height
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+    def insert(self, parent, index, values=()):
+        self.counter += 1
+        item = f"I{self.counter}"
+        self.items[item] = values
+        self.order.append(item)
+        return item
+
+    def item(self, item, values=None):
+        if values is not None:
+            self.items[item] = values
+        return {"values": self.items[item]}
+
+    def move(self, item, parent, index):
+        pass
+
+    def detach(self, item):
+        pass
+
+    def delete(self, item):
+        self.items.pop(item, None)
+
+    def selection_set(self, items):
+        pass
+
+    def selection(self):
+        return ()
+
+    def bbox(self, item):
+        return None
+
+    def focus(self, item=None):
+        return ""
+
+class _HeadlessScrollbar:
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, first, last):
+        pass
+
+def bench_storage(work_dir, tasks, repeat, lm):
+    results = {}
+    json_file = os.path.join(work_dir, f"tasks-{len(tasks)}.json")
+    dm = DataManager(json_file, lm)
+    results["json_save_tasks"] = measure(lambda: dm.save_tasks(tasks), repeat)
+    results["json_load_tasks"] = measure(lambda: DataManager(json_file, lm).load_tasks(), repeat)
+
+    def put_tasks():
+        for i in range(1000):
+            dm.put_task(f"extra-{i}", {"name": f"extra-{i}", "command": "echo"})
+        dm.flush()
+
+    results["json_put_1000_tasks"] = measure(put_tasks, repeat)
+
+    db_file = os.path.join(work_dir, f"tasks-{len(tasks)}.db")
+    sm = SqliteDataManager(db_file, lm)
+    results["sqlite_save_tasks"] = measure(lambda: sm.save_tasks(tasks), repeat)
+    results["sqlite_search_tasks"] = measure(lambda: sm.search_tasks("module 4", 100), repeat)
+    sm.conn.close()
+    return results
+
+def bench_list(work_dir, tasks, repeat, lm):
+    """任务列表：全量显示、滚动以及带索引的搜索"""
+    results = {}
+    json_file = os.path.join(work_dir, f"list-{len(tasks)}.json")
+    DataManager(json_file, lm).save_tasks(tasks)
+    tm = TaskManager(DataManager(json_file, lm), lm)
+    names = list(tasks)
+    task_list = VirtualTaskList(_HeadlessTree(), _HeadlessScrollbar(), lambda name: (name, tasks[name]["command"], "", ""))
+    results["list_populate"] = measure(lambda: task_list.set_names(names), repeat)
+    results["list_scroll_100_pages"] = measure(lambda: [task_list.scroll(task_list.rows) for _ in range(100)], repeat)
+    tm.search_task_names("warmup")
+    results["search_index_build"] = measure(lambda: (setattr(tm, "search_index", None), tm.search_task_names("x")), repeat)
+    results["search_query"] = measure(lambda: [tm.search_task_names(query) for query in ("task-0001", "module 12", "targt", "out/5")], repeat)
+    return results
+
+def bench_engine(work_dir, repeat, lm, count=200):
+    """执行引擎：大量空指令的批量吞吐量"""
+    json_file = os.path.join(work_dir, "engine.json")
+    tm = TaskManager(DataManager(json_file, lm), lm)
+    command = "exit 0"
+    for i in range(count):
+        tm.add_task(f"noop-{i}", command)
+    names = [f"noop-{i}" for i in range(count)]
+    noop = lambda *args: None
+    result = measure(lambda: tm.run_tasks_and_wait(names, noop, noop), repeat)
+    result["tasks"] = count
+    result["tasks_per_second"] = count / result["median"]
+    tm.shutdown()
+    return {"run_multiple_tasks": result}
+
+def bench_output(work_dir, repeat, lm, lines=200000):
+    """输出捕获：单个进程高速输出时每秒处理的行数"""
+    json_file = os.path.join(work_dir, "output.json")
+    tm = TaskManager(DataManager(json_file, lm), lm, output_dir=os.path.join(work_dir, "output"))
+    script = os.path.join(work_dir, "producer.py")
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(f"import sys\nsys.stdout.write(''.join('line %d of synthetic output\\n' % i for i in range({lines})))\n")
+    tm.add_task("producer", subprocess.list2cmdline([sys.executable, script]))
+    received = []
+    result = measure(lambda: (received.clear(), tm._execute_task(tm.tasks["producer"], lambda *args: None, received.append)), repeat)
+    result["lines"] = lines
+    result["lines_per_second"] = lines / result["median"]
+    result["lines_received"] = len(received)
+    return {"output_capture": result}
+
+def bench_logging(work_dir, repeat, lm, count=100000):
+    log_file = os.path.join(work_dir, "logs", "execution.log")
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    log_manager = LogManager(log_file, lm)
+    message = "synthetic log line with some typical length for a command output"
+    results = {}
+
+    def write():
+        for _ in range(count):
+            log_manager.write_log(message)
+        log_manager.flush()
+
+    results["write_log"] = measure(write, repeat)
+    results["write_log"]["lines"] = count
+    results["write_logs_batch"] = measure(lambda: (log_manager.write_logs([message] * count), log_manager.flush()), repeat)
+    results["get_recent_logs_1000"] = measure(lambda: log_manager.get_recent_logs(1000), repeat)
+    log_manager.close()
+    return results
+
+def bench_language(repeat, lm, count=1000000):
+    keys = ["messages.start_task", "task_status.running", "buttons.execute_selected", "messages.missing_key"]
+    get_text = lm.get_text
+
+    def lookup():
+        for i in range(count):
+            get_text(keys[i & 3])
+
+    result = measure(lookup, repeat)
+    result["lookups"] = count
+    return {"get_text": result}
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+def run(sizes, repeat):
+    lm = LanguageManager()
+    work_dir = tempfile.mkdtemp(prefix="cmdmanager-bench-")
+    try:
+        results = {"environment": environment(), "repeat": repeat, "benchmarks": {}}
+        benchmarks = results["benchmarks"]
+        for size in sizes:
+            tasks = make_tasks(size)
+            for name, value in bench_storage(work_dir, tasks, repeat, lm).items():
+                benchmarks[f"{name}[{size}]"] = value
+            for name, value in bench_list(work_dir, tasks, repeat, lm).items():
+                benchmarks[f"{name}[{size}]"] = value
+        benchmarks.update(bench_engine(work_dir, repeat, lm))
+        benchmarks.update(bench_output(work_dir, repeat, lm))
+        benchmarks.update(bench_logging(work_dir, repeat, lm))
+        benchmarks.update(bench_language(repeat, lm))
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def compare(old_file, new_file):
+    """按中位数比较两份结果，打印变化比例"""
+    with open(old_file, encoding="utf-8") as f:
+        old = json.load(f)["benchmarks"]
+    with open(new_file, encoding="utf-8") as f:
+        new = json.load(f)["benchmarks"]
+    width = max(len(name) for name in new)
+    for name in new:
+        if name not in old:
+            print(f"{name:<{width}}  {new[name]['median'] * 1000:10.2f} ms  (new)")
+            continue
+        before, after = old[name]["median"], new[name]["median"]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<{width}}  {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms  {change:+7.1f}%")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CmdManager benchmarks")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated task library sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    results = run([int(size) for size in args.sizes.split(",") if size], max(1, args.repeat))
+    data = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        print(data)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""无界面的命令行入口，与图形界面共用任务库、执行引擎和日志
+
+    python cmdmanager.py list [--search 文本]
+    python cmdmanager.py run 任务名 [--timeout 秒]
+    python cmdmanager.py batch 任务名 ... [--parallel N] [--ordered]
+    python cmdmanager.py tail [-n 行数] [-f]
+    python cmdmanager.py daemon [--socket 路径]
+
+run/batch/list 指定 --socket 时提交给正在运行的守护进程执行。
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from task_manager import TaskManager
+from log_manager import LogManager
+from task_storage import open_data_manager
+from language_manager import LanguageManager
+
+def default_socket_path():
+    """守护进程默认监听的 Unix 套接字路径"""
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.environ.get("CMDMANAGER_SOCKET", os.path.join(tempfile.gettempdir(), f"cmdmanager-{uid}.sock"))
+
+class Engine:
+    """命令行和守护进程共用的任务管理器、存储和日志"""
+    def __init__(self, tasks_file, log_file, language=None):
+        self.language_manager = LanguageManager()
+        if language:
+            self.language_manager.switch_language(language)
+        self.data_manager = open_data_manager(tasks_file, self.language_manager)
+        self.log_manager = LogManager(log_file, self.language_manager)
+        self.task_manager = TaskManager(self.data_manager, self.language_manager, log_manager=self.log_manager)
+        self.status_text = self.language_manager.get_text
+
+    def run(self, task_names, emit, parallel=None, ordered=False, timeout=None, batch_timeout=None, force=False):
+        """执行任务并等待结束，日志同时写入日志文件，返回 {任务名: 退出码}
+
+        force 为 True 时本次执行忽略结果缓存。
+        """
+        def log_callback(message):
+            self.log_manager.write_log(message)
+            emit({"type": "log", "message": message})
+
+        def status_callback(task_name, status):
+            emit({"type": "status", "task": task_name, "status": status, "text": self.status_text(status)})
+
+        return self.task_manager.run_tasks_and_wait(
+            task_names, status_callback, log_callback,
+            max_parallel=parallel, ordered=ordered, timeout=timeout, batch_timeout=batch_timeout, force=force
+        )
+
+    def list(self, search=None, limit=None):
+        if search:
+            tasks = self.task_manager.search_tasks(search, limit or 100)
+        else:
+            tasks = self.task_manager.list_tasks(0, limit or self.task_manager.count_tasks())
+        return [{"name": task["name"], "command": task["command"], "type": self.task_manager.get_task_type(task["name"])}
+                for task in tasks]
+
+    def close(self):
+        self.task_manager.shutdown()
+        self.log_manager.close()
+
+def exit_code(results):
+    """全部任务成功时返回 0，否则返回第一个失败任务的退出码（未执行的任务视为 1）"""
+    for return_code in results.values():
+        if return_code != 0:
+            return return_code if isinstance(return_code, int) and 0 < return_code < 256 else 1
+    return 0
+
+def print_event(event):
+    if event["type"] == "log" and event["message"]:
+        print(event["message"], flush=True)
+
+def print_tasks(tasks):
+    for task in tasks:
+        print(f"{task['name']}\t{task['type']}\t{task['command']}")
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """每个连接读取一行 JSON 请求，执行时以 JSON 行返回事件，最后返回 result 事件"""
+    def handle(self):
+        engine = self.server.engine
+        write_lock = threading.Lock()
+
+        def send(event):
+            data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            with write_lock:
+                try:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                except OSError:
+                    # 客户端断开后任务继续执行，只是不再返回输出
+                    pass
+
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            action = request.get("action")
+            if action == "run":
+                results = engine.run(request["tasks"], send, request.get("parallel"), request.get("ordered", False),
+                                     request.get("timeout"), request.get("batch_timeout"), request.get("force", False))
+                send({"type": "result", "return_codes": results})
+            elif action == "list":
+                send({"type": "result", "tasks": engine.list(request.get("search"), request.get("limit"))})
+            elif action == "reload":
+                engine.task_manager.reload_tasks()
+                send({"type": "result"})
+            else:
+                send({"type": "error", "message": f"unknown action: {action}"})
+        except Exception as e:
+            send({"type": "error", "message": str(e)})
+
+def serve(engine, socket_path):
+    """在 Unix 套接字上接受执行请求，每个连接由单独的线程处理，所有请求共用同一个执行引擎"""
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        print("daemon mode requires Unix domain sockets", file=sys.stderr)
+        return 2
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _RequestHandler)
+    server.daemon_threads = True
+    server.engine = engine
+    os.chmod(socket_path, 0o600)
+    # 收到 SIGTERM 时同样清理套接字文件后退出
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"listening on {socket_path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+    return 0
+
+def request(socket_path, payload):
+    """向守护进程发送请求并逐个产出返回的事件"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    with client, client.makefile("rb") as reader:
+        client.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        for line in reader:
+            yield json.loads(line.decode("utf-8"))
+
+def run_remote(socket_path, payload):
+    """通过守护进程执行请求，打印日志并返回结果事件"""
+    for event in request(socket_path, payload):
+        if event["type"] == "result":
+            return event
+        if event["type"] == "error":
+            raise RuntimeError(event["message"])
+        print_event(event)
+    raise RuntimeError("daemon closed the connection")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cmdmanager", description="Run CmdManager tasks without the GUI")
+    parser.add_argument("--tasks-file", default=os.environ.get("CMDMANAGER_TASKS_FILE", "tasks.json"))
+    parser.add_argument("--log-file", default="execution.log")
+    parser.add_argument("--lang", choices=["zh_CN", "en_US"])
+    parser.add_argument("--socket", help="send run/batch/list requests to the daemon listening on this socket")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    list_parser = commands.add_parser("list", help="list tasks")
+    list_parser.add_argument("--search")
+    list_parser.add_argument("--limit", type=int)
+
+    run_parser = commands.add_parser("run", help="run one task and wait for it")
+    run_parser.add_argument("task")
+    run_parser.add_argument("--timeout", type=float)
+    run_parser.add_argument("--force", action="store_true", help="run even if the task's declared inputs are unchanged")
+
+    batch_parser = commands.add_parser("batch", help="run several tasks concurrently and wait for them")
+    batch_parser.add_argument("tasks", nargs="+")
+    batch_parser.add_argument("--parallel", type=int)
+    batch_parser.add_argument("--ordered", action="store_true", help="print each task's output in submission order")
+    batch_parser.add_argument("--timeout", type=float)
+    batch_parser.add_argument("--batch-timeout", type=float)
+    batch_parser.add_argument("--force", action="store_true", help="run even if the tasks' declared inputs are unchanged")
+
+    tail_parser = commands.add_parser("tail", help="print the execution log")
+    tail_parser.add_argument("-n", "--lines", type=int, default=50)
+    tail_parser.add_argument("-f", "--follow", action="store_true")
+
+    daemon_parser = commands.add_parser("daemon", help="accept run requests on a Unix socket")
+    daemon_parser.add_argument("--socket", dest="daemon_socket", default=None)
+    daemon_parser.add_argument("--no-cache", action="store_true", help="never skip tasks whose declared inputs are unchanged")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command in ("run", "batch"):
+        task_names = [args.task] if args.command == "run" else args.tasks
+        payload = {
+            "action": "run",
+            "tasks": task_names,
+            "parallel": getattr(args, "parallel", None),
+            "ordered": getattr(args, "ordered", False),
+            "timeout": args.timeout,
+            "batch_timeout": getattr(args, "batch_timeout", None),
+            "force": args.force
+        }
+        if args.socket:
+            return exit_code(run_remote(args.socket, payload)["return_codes"])
+        engine = Engine(args.tasks_file, args.log_file, args.lang)
+        try:
+            return exit_code(engine.run(task_names, print_event, payload["parallel"], payload["ordered"],
+                                        payload["timeout"], payload["batch_timeout"], payload["force"]))
+        finally:
+            engine.close()
+
+    if args.command == "list":
+        if args.socket:
+            print_tasks(run_remote(args.socket, {"action": "list", "search": args.search, "limit": args.limit})["tasks"])
+            return 0
+        engine = Engine(args.tasks_file, args.log_file, args.lang)
+        try:
+            print_tasks(engine.list(args.search, args.limit))
+        finally:
+            engine.close()
+        return 0
+
+    if args.command == "tail":
+        log_manager = LogManager(args.log_file)
+        try:
+            for line in log_manager.get_recent_logs(args.lines):
+                print(line.rstrip("\n"))
+            if args.follow:
+                for line in log_manager.follow():
+                    print(line.rstrip("\n"), flush=True)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            log_manager.close()
+        return 0
+
+    engine = Engine(args.tasks_file, args.log_file, args.lang)
+    engine.task_manager.use_result_cache = not args.no_cache
+    try:
+        return serve(engine, args.daemon_socket or args.socket or default_socket_path())
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+# pause 未指定秒数或格式错误时的暂停时间
+DEFAULT_PAUSE = 3
+
+def split_command(command, windows=False):
+    """按顶层的 &&、|| 和顺序分隔符切分指令，返回 [(连接符, 片段), ...]
+
+    引号、转义字符（POSIX 为 \\，Windows 为 ^）和括号内的分隔符不切分。
+    顺序分隔符在 POSIX 下为 ; 和换行，在 Windows 下为 & 和换行，统一返回为
+    当前平台的写法；第一个片段的连接符为 None。
+    """
+    sequence = "&" if windows else ";"
+    escape = "^" if windows else "\\"
+    segments = []
+    current = []
+    op = None
+    quote = None
+    depth = 0
+    i = 0
+    n = len(command)
+
+    def add_segment(next_op):
+        text = "".join(current).strip()
+        if text:
+            segments.append((op if segments else None, text))
+        current.clear()
+        return next_op if segments else None
+
+    while i < n:
+        ch = command[i]
+        if quote:
+            current.append(ch)
+            if ch == quote:
+                quote = None
+            elif ch == "\\" and quote == '"' and not windows and i + 1 < n:
+                current.append(command[i + 1])
+                i += 1
+            i += 1
+            continue
+
+        if ch == escape and i + 1 < n:
+            current.append(command[i:i + 2])
+            i += 2
+            continue
+        if ch == '"' or (ch == "'" and not windows):
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")" and depth:
+            depth -= 1
+        elif depth == 0:
+            pair = command[i:i + 2]
+            if pair in ("&&", "||"):
+                op = add_segment(pair)
+                i += 2
+                continue
+            # Windows 下 2>&1 中的 & 属于重定向
+            if ch == "\n" or (ch == sequence and not (windows and current and current[-1] in "<>")):
+                op = add_segment(sequence)
+                i += 1
+                continue
+        current.append(ch)
+        i += 1
+
+    add_segment(None)
+    return segments
+
+@lru_cache(maxsize=4096)
+def parse_command(command, windows=False):
+    """把指令解析为执行计划 ((连接符, "shell"/"pause", 指令文本/秒数), ...)，结果按指令文本缓存"""
+    plan = []
+    for op, text in split_command(command, windows):
+        parts = text.split()
+        if parts[0].lower() == "pause" and len(parts) <= 2:
+            try:
+                seconds = int(parts[1])
+            except (IndexError, ValueError):
+                seconds = DEFAULT_PAUSE
+            plan.append((op, "pause", seconds))
+        else:
+            plan.append((op, "shell", text))
+    return tuple(plan)
+
+def plan_step(plan, index, return_code):
+    """取执行计划中从 index 开始的下一步，返回 (步骤, 下一步位置)
+
+    步骤为 None 表示该片段按 &&/|| 的结果被跳过；为 ("pause", 秒数) 或
+    ("shell", 指令)。连续的 shell 片段合并为一条指令交给同一个 shell 进程执行，
+    直到下一个 pause 为止，由 shell 自己处理其中的连接符。
+    """
+    op, kind, value = plan[index]
+    if (op == "&&" and return_code != 0) or (op == "||" and return_code == 0):
+        return None, index + 1
+    if kind == "pause":
+        return ("pause", value), index + 1
+    end = index + 1
+    parts = [value]
+    while end < len(plan) and plan[end][1] == "shell":
+        parts.append(plan[end][0])
+        parts.append(plan[end][2])
+        end += 1
+    return ("shell", " ".join(parts)), end
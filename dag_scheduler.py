@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class DagScheduler:
+    """依赖感知的聚合任务调度器：所有依赖已满足的节点并发执行"""
+    def __init__(self, nodes, dependencies, max_workers=4):
+        self.nodes = list(nodes)
+        self.dependencies = {node: list(dependencies.get(node, [])) for node in self.nodes}
+        self.max_workers = max(1, max_workers)
+        self._validate()
+
+    def _validate(self):
+        """检查未知依赖和循环依赖"""
+        node_set = set(self.nodes)
+        if len(node_set) != len(self.nodes):
+            raise ValueError("duplicate step in aggregate")
+        for node, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in node_set:
+                    raise ValueError(f"unknown dependency: {node} -> {dep}")
+        if len(self.topological_order()) != len(self.nodes):
+            raise ValueError("dependency cycle in aggregate")
+
+    def topological_order(self):
+        """按声明顺序稳定地返回拓扑序"""
+        remaining = {node: len(deps) for node, deps in self.dependencies.items()}
+        dependents = self._dependents()
+        order = []
+        ready = [node for node in self.nodes if remaining[node] == 0]
+        while ready:
+            node = ready.pop(0)
+            order.append(node)
+            for child in dependents[node]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        return order
+
+    def _dependents(self):
+        dependents = {node: [] for node in self.nodes}
+        for node, deps in self.dependencies.items():
+            for dep in deps:
+                dependents[dep].append(node)
+        return dependents
+
+    def run(self, run_node):
+        """执行整张图
+
+        run_node(node) 返回退出码。某个节点失败后，其所有下游节点被跳过，
+        与之无关的分支继续执行。返回 {节点: 结果} 字典，结果包含
+        status（completed/failed/skipped）、return_code、start、end。
+        """
+        remaining = {node: len(deps) for node, deps in self.dependencies.items()}
+        dependents = self._dependents()
+        results = {}
+        ready = [node for node in self.nodes if remaining[node] == 0]
+        running = {}
+
+        def skip_downstream(node):
+            stack = list(dependents[node])
+            while stack:
+                child = stack.pop()
+                if child in results:
+                    continue
+                results[child] = {"status": "skipped", "return_code": None, "start": None, "end": None}
+                stack.extend(dependents[child])
+
+        def timed_run(node):
+            start = time.monotonic()
+            try:
+                return_code = run_node(node)
+            except Exception:
+                return_code = -1
+            return return_code, start, time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag-node") as executor:
+            while ready or running:
+                while ready:
+                    node = ready.pop(0)
+                    if node not in results:
+                        running[executor.submit(timed_run, node)] = node
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    return_code, start, end = future.result()
+                    status = "completed" if return_code == 0 else "failed"
+                    results[node] = {"status": status, "return_code": return_code, "start": start, "end": end}
+                    if status == "failed":
+                        skip_downstream(node)
+                        continue
+                    for child in dependents[node]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0 and child not in results:
+                            ready.append(child)
+
+        return results
+
+    def critical_path(self, results):
+        """根据执行结果计算关键路径，返回 (节点列表, 路径耗时秒数)"""
+        finish = {}
+        previous = {}
+        for node in self.topological_order():
+            result = results.get(node)
+            if not result or result["start"] is None:
+                continue
+            duration = result["end"] - result["start"]
+            best_dep, best_finish = None, 0.0
+            for dep in self.dependencies[node]:
+                if dep in finish and finish[dep] > best_finish:
+                    best_dep, best_finish = dep, finish[dep]
+            finish[node] = best_finish + duration
+            previous[node] = best_dep
+
+        if not finish:
+            return [], 0.0
+        node = max(finish, key=finish.get)
+        total = finish[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return list(reversed(path)), total
@@ -1,35 +1,168 @@
+import atexit
 import json
 import os
+import threading
+from task_storage import TaskStorage, match_tasks
 
-class DataManager:
-    def __init__(self, tasks_file="tasks.json", language_manager=None):
+class DataManager(TaskStorage):
+    """JSON 文件任务库：快照 + 增量日志"""
+    def __init__(self, tasks_file="tasks.json", language_manager=None, save_delay=0.2, compact_threshold=500):
         self.tasks_file = tasks_file
         self.language_manager = language_manager
+        # 增量修改先追加到日志文件，累计到一定条数后再合并进快照
+        self.journal_file = tasks_file + ".journal"
+        self.save_delay = save_delay
+        self.compact_threshold = compact_threshold
+        self.tasks = {}
+        self.lock = threading.RLock()
+        self._pending = {}
+        self._journal_entries = 0
+        self._timer = None
         self._ensure_tasks_file()
+        atexit.register(self.flush)
 
     def _ensure_tasks_file(self):
         """确保任务文件存在"""
         if not os.path.exists(self.tasks_file):
             self.save_tasks({})
 
+    def _write_snapshot(self, path, tasks):
+        """先写临时文件再原子替换，避免写到一半时崩溃损坏任务库"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _replay_journal(self, tasks):
+        """将增量日志应用到快照上，返回 (已应用的条数, 是否有损坏的行)
+
+        崩溃时写了一半的行（以及之后追加到同一行上的内容）无法解析，跳过该行继续回放。
+        """
+        if not os.path.exists(self.journal_file):
+            return 0, False
+        count = 0
+        damaged = False
+        with open(self.journal_file, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    damaged = True
+                    continue
+                if entry["op"] == "put":
+                    tasks[entry["name"]] = entry["task"]
+                elif entry["op"] == "replace":
+                    tasks.pop(entry["name"], None)
+                    tasks[entry["name"]] = entry["task"]
+                elif entry["op"] == "delete":
+                    tasks.pop(entry["name"], None)
+                count += 1
+        return count, damaged
+
     def load_tasks(self):
-        """从文件加载任务列表"""
-        try:
-            with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            if self.language_manager:
-                print(self.language_manager.get_text("messages.load_failed").format(str(e)))
-            return {}
+        """从快照和增量日志加载任务列表"""
+        with self.lock:
+            self.flush()
+            try:
+                with open(self.tasks_file, 'r', encoding='utf-8') as f:
+                    tasks = json.load(f)
+                self._journal_entries, damaged = self._replay_journal(tasks)
+                self.tasks = dict(tasks)
+                if damaged:
+                    # 立即合并为新快照，否则之后的修改会追加在损坏的行后面，重新加载时丢失
+                    self.save_tasks(tasks)
+                return tasks
+            except Exception as e:
+                if self.language_manager:
+                    print(self.language_manager.get_text("messages.load_failed").format(str(e)))
+                return {}
 
     def save_tasks(self, tasks):
-        """保存任务列表到文件"""
-        try:
-            with open(self.tasks_file, 'w', encoding='utf-8') as f:
-                json.dump(tasks, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            if self.language_manager:
-                print(self.language_manager.get_text("messages.save_failed").format(str(e)))
+        """保存完整任务列表为新快照，并清空增量日志"""
+        with self.lock:
+            try:
+                self._pending.clear()
+                self._write_snapshot(self.tasks_file, tasks)
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+                self._journal_entries = 0
+                self.tasks = dict(tasks)
+            except Exception as e:
+                if self.language_manager:
+                    print(self.language_manager.get_text("messages.save_failed").format(str(e)))
+
+    def put_task(self, name, task):
+        """记录新增或修改的任务，延迟合并写入"""
+        with self.lock:
+            self.tasks[name] = task
+            # 删除后重新添加的任务会移到末尾，回放时需要先删除再添加
+            previous = self._pending.pop(name, None)
+            op = "replace" if previous and previous[0] in ("delete", "replace") else "put"
+            self._pending[name] = (op, task)
+            self._schedule_flush()
+
+    def delete_task(self, name):
+        """记录删除的任务，延迟合并写入"""
+        with self.lock:
+            self.tasks.pop(name, None)
+            self._pending.pop(name, None)
+            self._pending[name] = ("delete", None)
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """在 save_delay 秒后写出期间累积的修改（调用方需持有锁）"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """立即将待写入的修改追加到增量日志，必要时合并快照"""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                with open(self.journal_file, 'a', encoding='utf-8') as f:
+                    for name, (op, task) in pending.items():
+                        entry = {"op": op, "name": name}
+                        if task is not None:
+                            entry["task"] = task
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_entries += len(pending)
+            except Exception as e:
+                if self.language_manager:
+                    print(self.language_manager.get_text("messages.save_failed").format(str(e)))
+                return
+
+            if self._journal_entries >= self.compact_threshold:
+                self.compact()
+
+    def compact(self):
+        """把当前任务写成新快照并清空增量日志"""
+        with self.lock:
+            self.flush()
+            self.save_tasks(self.tasks)
+
+    def get_task(self, name):
+        return self.tasks.get(name)
+
+    def count_tasks(self):
+        return len(self.tasks)
+
+    def list_tasks(self, offset=0, limit=100):
+        return list(self.tasks.values())[offset:offset + limit]
+
+    def search_tasks(self, query, limit=100):
+        with self.lock:
+            return match_tasks(list(self.tasks.values()), query, limit)
 
     def export_tasks(self, file_path):
         """导出任务列表到指定文件"""
@@ -53,4 +186,4 @@ class DataManager:
         except Exception as e:
             if self.language_manager:
                 print(self.language_manager.get_text("messages.import_failed").format(str(e)))
-            return False
\ No newline at end of file
+            return False
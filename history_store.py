@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+
+class HistoryStore:
+    """基于 SQLite 的任务执行历史，按任务名和时间建立索引"""
+    def __init__(self, db_file="history.db"):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """创建表和索引"""
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_name TEXT NOT NULL,
+                    start_time REAL NOT NULL,
+                    end_time REAL NOT NULL,
+                    duration REAL NOT NULL,
+                    exit_code INTEGER,
+                    status TEXT NOT NULL,
+                    stdout_bytes INTEGER NOT NULL DEFAULT 0,
+                    stderr_bytes INTEGER NOT NULL DEFAULT 0,
+                    output_file TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_runs_task_time ON runs (task_name, start_time);
+                CREATE INDEX IF NOT EXISTS idx_runs_time ON runs (start_time);
+                CREATE TABLE IF NOT EXISTS run_steps (
+                    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+                    seq INTEGER NOT NULL,
+                    command TEXT NOT NULL,
+                    start_time REAL NOT NULL,
+                    end_time REAL NOT NULL,
+                    exit_code INTEGER,
+                    PRIMARY KEY (run_id, seq)
+                );
+            """)
+            # 旧版本数据库没有 output_file 列
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(runs)")]
+            if "output_file" not in columns:
+                self.conn.execute("ALTER TABLE runs ADD COLUMN output_file TEXT")
+
+    def record_run(self, record):
+        """保存一次执行记录，返回记录 id
+
+        record 包含 task_name、start_time、end_time、exit_code、status、
+        stdout_bytes、stderr_bytes、output_file（完整输出文件）以及 steps（子命令结果列表）。
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (task_name, start_time, end_time, duration, exit_code, status, stdout_bytes, stderr_bytes, output_file) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (record["task_name"], record["start_time"], record["end_time"],
+                 record["end_time"] - record["start_time"], record.get("exit_code"), record["status"],
+                 record.get("stdout_bytes", 0), record.get("stderr_bytes", 0), record.get("output_file"))
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO run_steps (run_id, seq, command, start_time, end_time, exit_code) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, seq, step["command"], step["start_time"], step["end_time"], step.get("exit_code"))
+                 for seq, step in enumerate(record.get("steps", []))]
+            )
+            return run_id
+
+    def get_runs(self, task_name=None, status=None, since=None, until=None, limit=100, offset=0):
+        """按条件查询执行记录，按开始时间倒序"""
+        clauses = []
+        params = []
+        if task_name is not None:
+            clauses.append("task_name = ?")
+            params.append(task_name)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("start_time >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("start_time < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM runs {where} ORDER BY start_time DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_last_run(self, task_name, status=None):
+        """获取任务最近一次（指定状态的）执行记录"""
+        runs = self.get_runs(task_name=task_name, status=status, limit=1)
+        return runs[0] if runs else None
+
+    def get_run_steps(self, run_id):
+        """获取一次执行的子命令结果"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, command, start_time, end_time, exit_code FROM run_steps WHERE run_id = ? ORDER BY seq",
+                (run_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_task_stats(self, task_name):
+        """汇总任务的执行次数、失败次数、平均耗时和最近一次执行时间"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS runs, SUM(status = 'failed') AS failures, AVG(duration) AS avg_duration, "
+                "MAX(duration) AS max_duration, MAX(start_time) AS last_run FROM runs WHERE task_name = ?",
+                (task_name,)
+            ).fetchone()
+        stats = dict(row)
+        stats["failures"] = stats["failures"] or 0
+        return stats
+
+    def clear(self):
+        """清空所有执行记录"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM run_steps")
+            self.conn.execute("DELETE FROM runs")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
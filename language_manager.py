@@ -7,6 +7,10 @@ class LanguageManager:
         self.language_file = language_file
         self.current_language = "zh_CN"  # 默认使用中文
         self.languages = {}
+        # 当前语言展开后的 "a.b" -> 文本 查找表，以及预绑定的格式化函数
+        self.texts = {}
+        self.formatters = {}
+        self.missing_keys = set()
         self.load_languages()
 
     def load_languages(self):
@@ -27,23 +31,55 @@ class LanguageManager:
         except Exception as e:
             print(f"加载语言配置失败: {str(e)}")
             self.languages = {}
+        self._build_texts()
+
+    def _flatten(self, node, prefix=""):
+        """把嵌套的语言配置展开为以点号连接的键"""
+        texts = {}
+        for key, value in node.items():
+            full_key = f"{prefix}{key}"
+            texts[full_key] = value
+            if isinstance(value, dict):
+                texts.update(self._flatten(value, f"{full_key}."))
+        return texts
+
+    def _build_texts(self):
+        """加载或切换语言时重建查找表"""
+        self.texts = self._flatten(self.languages.get(self.current_language, {}))
+        self.formatters = {}
 
     def get_text(self, key, default=""):
-        """获取指定键的文本"""
+        """获取指定键的文本，支持多级键，如 'task_list.name'"""
         try:
-            # 支持多级键，如 'task_list.name'
-            keys = key.split('.')
-            value = self.languages.get(self.current_language, {})
-            for k in keys:
-                value = value.get(k, default)
-            return value
-        except Exception:
+            return self.texts[key]
+        except KeyError:
+            self.missing_keys.add(key)
             return default
 
+    def get_formatter(self, key):
+        """获取预绑定的格式化函数，如 get_formatter('messages.error')(line)"""
+        formatter = self.formatters.get(key)
+        if formatter is None:
+            formatter = str(self.get_text(key)).format
+            self.formatters[key] = formatter
+        return formatter
+
+    def get_missing_keys(self):
+        """获取运行中请求过但当前语言缺失的键，以及各语言相对其他语言缺失的键"""
+        report = {"requested": sorted(self.missing_keys)}
+        flattened = {code: self._flatten(texts) for code, texts in self.languages.items()}
+        all_keys = set()
+        for texts in flattened.values():
+            all_keys.update(texts)
+        for code, texts in flattened.items():
+            report[code] = sorted(all_keys - set(texts))
+        return report
+
     def switch_language(self, language_code):
         """切换语言"""
         if language_code in self.languages:
             self.current_language = language_code
+            self._build_texts()
             return True
         return False
 
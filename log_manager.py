@@ -1,11 +1,66 @@
+import atexit
+import glob
+import gzip
 import os
+import shutil
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from history_store import HistoryStore
+
+# 缓冲区写满时的处理策略
+OVERFLOW_BLOCK = "block"  # 阻塞写入方直到有空间
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # 丢弃最早的日志
+OVERFLOW_SAMPLE = "sample"  # 只保留每 sample_rate 条中的一条
 
 class LogManager:
-    def __init__(self, log_file="execution.log", language_manager=None):
+    def __init__(self, log_file="execution.log", language_manager=None, buffer_size=10000,
+                 flush_interval=0.5, flush_bytes=64 * 1024, overflow_policy=OVERFLOW_BLOCK, sample_rate=10,
+                 max_bytes=10 * 1024 * 1024, rotate_daily=True, retention_bytes=200 * 1024 * 1024, retention_days=30,
+                 history_file=None):
         self.log_file = log_file
         self.language_manager = language_manager
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.overflow_policy = overflow_policy
+        self.sample_rate = max(1, sample_rate)
+        # 日志轮转与归档保留策略，max_bytes/retention_* 为 0 表示不限制
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.retention_bytes = retention_bytes
+        self.retention_days = retention_days
+        self._file_lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+        # 结构化执行历史默认保存在日志文件所在目录的 history.db 中
+        if history_file is None:
+            history_file = os.path.join(os.path.dirname(os.path.abspath(log_file)), "history.db")
+        self.history_file = history_file
+        self._history = None
+        self._history_lock = threading.Lock()
+
+        # 后台写入线程使用的缓冲区及同步状态
+        self._buffer = deque()
+        self._buffered_bytes = 0
+        self._condition = threading.Condition()
+        self._queued_count = 0
+        self._done_count = 0
+        self._dropped_count = 0
+        self._flush_requested = False
+        self._overflow_count = 0
+        self._closed = False
+        self._writer = None
+
+        # 同一秒内复用格式化后的时间戳
+        self._timestamp_second = None
+        self._timestamp_text = ""
+
         self._ensure_log_file()
+        self._current_size = os.path.getsize(self.log_file)
+        self._header_size = self._measure_header()
+        self._segment_date = datetime.fromtimestamp(os.path.getmtime(self.log_file)).date()
+        atexit.register(self.close)
 
     def _ensure_log_file(self):
         """确保日志文件存在"""
@@ -19,33 +74,325 @@ class LogManager:
                     create_time = "Create Time"
                 f.write(f"{title}\n{create_time}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
 
+    def _measure_header(self):
+        """获取当前日志段文件头（第一条日志之前的内容）的字节数，只有文件头的日志段不需要轮转"""
+        with open(self.log_file, 'rb') as f:
+            data = f.read(4096)
+        if data.startswith(b"["):
+            return 0
+        position = data.find(b"\n[")
+        if position >= 0:
+            return position + 1
+        return len(data) if len(data) == self._current_size else 0
+
+    def _timestamp(self):
+        """获取当前时间戳文本，每秒只格式化一次"""
+        now = time.time()
+        second = int(now)
+        if second != self._timestamp_second:
+            self._timestamp_text = datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+            self._timestamp_second = second
+        return self._timestamp_text
+
+    def _start_writer(self):
+        """按需启动后台写入线程（调用方需持有锁）"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, name="log-writer")
+            self._writer.daemon = True
+            self._writer.start()
+
+    def _enqueue(self, entry):
+        """将日志条目放入缓冲区，缓冲区满时按策略处理（调用方需持有锁）"""
+        if len(self._buffer) >= self.buffer_size:
+            if self.overflow_policy == OVERFLOW_BLOCK:
+                self._start_writer()
+                while len(self._buffer) >= self.buffer_size and not self._closed:
+                    self._flush_requested = True
+                    self._condition.notify_all()
+                    self._condition.wait()
+            elif self.overflow_policy == OVERFLOW_SAMPLE:
+                self._overflow_count += 1
+                if self._overflow_count % self.sample_rate:
+                    self._dropped_count += 1
+                    return
+                self._drop_oldest()
+            else:
+                self._drop_oldest()
+
+        self._buffer.append(entry)
+        self._buffered_bytes += len(entry)
+        self._queued_count += 1
+
+    def _drop_oldest(self):
+        old_entry = self._buffer.popleft()
+        self._buffered_bytes -= len(old_entry)
+        self._done_count += 1
+        self._dropped_count += 1
+
     def write_log(self, message):
-        """写入日志"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = f"[{timestamp}] {message}\n"
+        """写入日志（由后台线程批量落盘）"""
+        self.write_logs((message,))
+
+    def write_logs(self, messages):
+        """批量写入日志"""
+        with self._condition:
+            if self._closed:
+                return
+            timestamp = self._timestamp()
+            for message in messages:
+                self._enqueue(f"[{timestamp}] {message}\n")
+            self._start_writer()
+            if self._buffered_bytes >= self.flush_bytes:
+                self._condition.notify_all()
 
+    def _writer_loop(self):
+        """后台写入线程：缓冲达到大小阈值或等待超过时间间隔时批量写入文件"""
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closed and not self._flush_requested:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and not self._flush_requested and self._buffered_bytes < self.flush_bytes:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                entries = list(self._buffer)
+                self._buffer.clear()
+                self._buffered_bytes = 0
+                dropped, self._dropped_count = self._dropped_count, 0
+                self._flush_requested = False
+                closed = self._closed
+                # 唤醒被阻塞的写入方
+                self._condition.notify_all()
+
+            if entries or dropped:
+                lines = entries
+                if dropped:
+                    lines = entries + [f"[{self._timestamp()}] {dropped} log entries dropped\n"]
+                self._write_entries(lines)
+
+            with self._condition:
+                self._done_count += len(entries)
+                self._condition.notify_all()
+                if closed and not self._buffer:
+                    self._writer = None
+                    return
+
+    def _write_entries(self, entries):
+        """写入一批日志；逐条检查轮转条件，在超出 max_bytes 的位置切换到新的日志段"""
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
+            with self._file_lock:
+                f = open(self.log_file, 'a', encoding='utf-8')
+                try:
+                    chunk = []
+                    for entry in entries:
+                        size = len(entry.encode('utf-8'))
+                        if self._should_rotate(size):
+                            f.write("".join(chunk))
+                            chunk = []
+                            f.close()
+                            self._rotate()
+                            f = open(self.log_file, 'a', encoding='utf-8')
+                        chunk.append(entry)
+                        self._current_size += size
+                    f.write("".join(chunk))
+                    self._current_size = f.tell()
+                finally:
+                    f.close()
         except Exception as e:
             if self.language_manager:
                 print(self.language_manager.get_text("messages.write_log_failed").format(str(e)))
 
+    def _should_rotate(self, incoming_bytes):
+        """判断写入前是否需要轮转（按大小或跨天）"""
+        if self._current_size <= self._header_size:
+            # 只有文件头的日志段不轮转，跨天时直接作为新一天的日志段
+            self._segment_date = datetime.now().date()
+            return False
+        if self.rotate_daily and self._segment_date != datetime.now().date():
+            return True
+        return bool(self.max_bytes) and self._current_size + incoming_bytes > self.max_bytes
+
+    def _rotate(self):
+        """将当前日志改名为归档段，新建日志文件，并在后台压缩归档（调用方需持有文件锁）"""
+        suffix = datetime.now().strftime('%Y%m%d-%H%M%S')
+        segment = f"{self.log_file}.{suffix}"
+        index = 1
+        while os.path.exists(segment) or os.path.exists(segment + ".gz"):
+            segment = f"{self.log_file}.{suffix}-{index}"
+            index += 1
+        os.replace(self.log_file, segment)
+
+        self._ensure_log_file()
+        self._current_size = self._header_size = os.path.getsize(self.log_file)
+        self._segment_date = datetime.now().date()
+
+        thread = threading.Thread(target=self._archive_segment, args=(segment,), name="log-archiver")
+        thread.daemon = True
+        thread.start()
+
+    def _archive_segment(self, segment):
+        """gzip 压缩轮转出的日志段，然后按保留策略清理旧归档"""
+        with self._archive_lock:
+            try:
+                with open(segment, 'rb') as src, gzip.open(segment + ".gz", 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(segment)
+            except Exception as e:
+                if self.language_manager:
+                    print(self.language_manager.get_text("messages.write_log_failed").format(str(e)))
+            self.enforce_retention()
+
+    def get_archives(self):
+        """获取已压缩的日志归档，按时间从旧到新排列"""
+        archives = glob.glob(glob.escape(self.log_file) + ".*.gz")
+        return sorted(archives, key=lambda archive: os.stat(archive).st_mtime_ns)
+
+    def enforce_retention(self):
+        """删除超出保留天数或总大小预算的旧归档"""
+        archives = self.get_archives()
+        if self.retention_days:
+            cutoff = time.time() - self.retention_days * 86400
+            for archive in list(archives):
+                if os.path.getmtime(archive) < cutoff:
+                    os.remove(archive)
+                    archives.remove(archive)
+        if self.retention_bytes:
+            total = sum(os.path.getsize(archive) for archive in archives)
+            while archives and total > self.retention_bytes:
+                archive = archives.pop(0)
+                total -= os.path.getsize(archive)
+                os.remove(archive)
+
+    def flush(self, timeout=None):
+        """立即写出并等待调用前提交的日志全部落盘"""
+        with self._condition:
+            target = self._queued_count
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._done_count < target and self._writer is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._flush_requested = True
+                self._condition.notify_all()
+                self._condition.wait(remaining)
+
+    def close(self):
+        """写出剩余日志并停止后台线程"""
+        with self._condition:
+            self._closed = True
+            writer = self._writer
+            self._condition.notify_all()
+        if writer is not None and writer is not threading.current_thread():
+            writer.join()
+
+    def _read_tail(self, count):
+        """从文件末尾按块反向读取，返回最后 count 行（耗时与 count 成正比）"""
+        block_size = 8192
+        with open(self.log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            # 多读一个换行符，保证第一行是完整的
+            while position > 0 and data.count(b"\n") <= count:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+        lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+        return lines[-count:] if count else []
+
     def get_recent_logs(self, lines=100):
         """获取最近的日志记录"""
+        return self.get_logs(0, lines)
+
+    def get_logs(self, offset=0, limit=100):
+        """分页获取日志，offset 为从最新一行往前跳过的行数，结果按时间顺序排列"""
+        self.flush()
         try:
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                logs = f.readlines()
-                return logs[-lines:] if len(logs) > lines else logs
+            logs = self._read_tail(offset + limit)
+            # offset 超出文件开头时没有更早的日志
+            return logs[:max(0, len(logs) - offset)] if offset else logs
         except Exception as e:
             if self.language_manager:
                 print(self.language_manager.get_text("messages.read_log_failed").format(str(e)))
             return []
 
+    def follow(self, poll_interval=0.5, stop_event=None):
+        """实时跟踪日志文件，逐行产出新写入的日志；日志轮转或清空后自动从新文件开头继续"""
+        self.flush()
+        f = open(self.log_file, 'r', encoding='utf-8', errors='replace')
+        try:
+            f.seek(0, os.SEEK_END)
+            inode = os.fstat(f.fileno()).st_ino
+            pending = ""
+            while stop_event is None or not stop_event.is_set():
+                chunk = f.read()
+                if chunk:
+                    pending += chunk
+                    lines = pending.split("\n")
+                    pending = lines.pop()
+                    for line in lines:
+                        yield line + "\n"
+                    continue
+
+                time.sleep(poll_interval)
+                try:
+                    stat = os.stat(self.log_file)
+                except OSError:
+                    continue
+                if stat.st_ino != inode or stat.st_size < f.tell():
+                    if stat.st_ino != inode:
+                        # 日志已轮转，先读完旧文件中轮转前写入的内容
+                        for line in (pending + f.read()).splitlines():
+                            yield line + "\n"
+                    f.close()
+                    f = open(self.log_file, 'r', encoding='utf-8', errors='replace')
+                    inode = os.fstat(f.fileno()).st_ino
+                    pending = ""
+        finally:
+            f.close()
+
+    @property
+    def history(self):
+        """执行历史库，首次使用时才打开，避免拖慢启动"""
+        with self._history_lock:
+            if self._history is None:
+                self._history = HistoryStore(self.history_file)
+            return self._history
+
+    def record_run(self, record):
+        """保存一次任务执行的结构化记录"""
+        try:
+            return self.history.record_run(record)
+        except Exception as e:
+            if self.language_manager:
+                print(self.language_manager.get_text("messages.write_log_failed").format(str(e)))
+            return None
+
+    def get_run_history(self, task_name=None, status=None, since=None, until=None, limit=100, offset=0):
+        """查询执行历史，按开始时间倒序"""
+        return self.history.get_runs(task_name, status, since, until, limit, offset)
+
+    def get_last_run(self, task_name, status=None):
+        """获取任务最近一次执行记录，例如 get_last_run(name, "failed")"""
+        return self.history.get_last_run(task_name, status)
+
+    def get_run_steps(self, run_id):
+        """获取一次执行中各子命令的结果"""
+        return self.history.get_run_steps(run_id)
+
+    def get_task_stats(self, task_name):
+        """获取任务的执行统计"""
+        return self.history.get_task_stats(task_name)
+
     def clear_logs(self):
         """清空日志文件"""
+        self.flush()
         try:
-            with open(self.log_file, 'w', encoding='utf-8') as f:
+            with self._file_lock, open(self.log_file, 'w', encoding='utf-8') as f:
                 if self.language_manager:
                     title = self.language_manager.get_text("log_title")
                     clear_time = self.language_manager.get_text("messages.clear_time")
@@ -53,6 +400,8 @@ class LogManager:
                     title = "=== BAT Task Manager Log ==="
                     clear_time = "Clear Time"
                 f.write(f"{title}\n{clear_time}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+                self._current_size = self._header_size = f.tell()
+                self._segment_date = datetime.now().date()
         except Exception as e:
             if self.language_manager:
                 print(self.language_manager.get_text("messages.clear_log_failed").format(str(e)))
\ No newline at end of file
@@ -1,28 +1,100 @@
+import time
+STARTUP_BEGIN = time.perf_counter()
+
+import os
+import sys
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from collections import deque
+from tkinter import ttk, messagebox
 from task_manager import TaskManager
 from log_manager import LogManager
-from data_manager import DataManager
+from task_storage import open_data_manager
 from language_manager import LanguageManager
+from virtual_task_list import VirtualTaskList
+from metrics import timing
+
+class StartupProfiler:
+    """记录启动各阶段耗时，使用 --profile-startup 启动时输出报告"""
+    def __init__(self, enabled=False, start=None):
+        self.enabled = enabled
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase):
+        """记录从上一个阶段结束到现在的耗时"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("startup profile:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<16}{seconds * 1000:10.1f} ms")
+        print(f"  {'total':<16}{(self.last - self.start) * 1000:10.1f} ms")
 
 class BatTaskManagerApp:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        self.profiler = profiler or StartupProfiler()
         self.version = "0.0.1"  # 添加版本号
         self.language_manager = LanguageManager()
         self.root.title(f"{self.language_manager.get_text('title')} v{self.version}")
         self.root.geometry("800x600")
+        self.profiler.mark("language")
 
-        # 初始化管理器
-        self.data_manager = DataManager(language_manager=self.language_manager)
-        self.task_manager = TaskManager(self.data_manager, self.language_manager)
+        # 初始化管理器，任务在窗口显示后于后台线程加载
+        # 任务库文件以 .db 结尾时使用 SQLite 存储
+        self.data_manager = open_data_manager(os.environ.get("CMDMANAGER_TASKS_FILE", "tasks.json"), self.language_manager)
         self.log_manager = LogManager(language_manager=self.language_manager)
-
-        # 创建主界面
+        self.task_manager = TaskManager(self.data_manager, self.language_manager, log_manager=self.log_manager, load_tasks=False)
+        self.profiler.mark("managers")
+
+        # 工作线程只向队列追加事件，由主线程定时批量刷新界面
+        self.ui_events = deque()
+        self.ui_pump_interval = 50  # 毫秒
+        self.ui_pump_batch = 10000  # 每帧最多处理的事件数
+        self.log_max_lines = 5000  # 日志框最多保留的行数
+        self.stats_window = None
+        self.stats_interval = 1000  # 统计面板刷新间隔（毫秒）
+
+        # 任务列表模型：全部任务名的显示顺序，以及各任务的状态和显示内容缓存
+        self.task_order = []
+        self.task_statuses = {}
+        self.task_values = {}
+        self.search_job = None
+        self.search_delay = 150  # 毫秒
+
+        # 创建主界面，任务库加载完成前禁止添加、聚合和导入任务
         self.create_widgets()
-        
-        # 加载已保存的任务
+        self.set_editing_enabled(False)
+        self.profiler.mark("widgets")
+
+        # 窗口显示后再加载已保存的任务
+        self.root.after_idle(self.on_window_shown)
+
+        self.root.after(self.ui_pump_interval, self.pump_ui_events)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_window_shown(self):
+        self.profiler.mark("window_shown")
+        thread = threading.Thread(target=self.load_tasks_in_background)
+        thread.daemon = True
+        thread.start()
+
+    def load_tasks_in_background(self):
+        """在后台线程读取任务库，完成后交给主线程刷新列表"""
+        self.task_manager.reload_tasks()
+        self.ui_events.append(("call", self.on_tasks_loaded))
+
+    def on_tasks_loaded(self):
         self.load_tasks()
+        self.set_editing_enabled(True)
+        self.profiler.mark("tasks_loaded")
+        self.profiler.report()
 
     def create_widgets(self):
         # 创建顶部菜单栏
@@ -84,6 +156,12 @@ class BatTaskManagerApp:
         self.aggregate_name_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.create_aggregate_button = ttk.Button(aggregate_frame, text=self.language_manager.get_text("create_aggregate"), command=self.create_aggregate)
         self.create_aggregate_button.pack(side=tk.LEFT, padx=5)
+        self.parallel_aggregate_var = tk.BooleanVar(value=False)
+        self.parallel_aggregate_checkbox = ttk.Checkbutton(aggregate_frame, text=self.language_manager.get_text("buttons.parallel_aggregate"), variable=self.parallel_aggregate_var)
+        self.parallel_aggregate_checkbox.pack(side=tk.LEFT, padx=5)
+        self.session_aggregate_var = tk.BooleanVar(value=False)
+        self.session_aggregate_checkbox = ttk.Checkbutton(aggregate_frame, text=self.language_manager.get_text("buttons.session_aggregate"), variable=self.session_aggregate_var)
+        self.session_aggregate_checkbox.pack(side=tk.LEFT, padx=5)
 
         # 区域3：搜索区域
         search_frame = ttk.Frame(task_frame)
@@ -119,9 +197,10 @@ class BatTaskManagerApp:
                        {'children': [('Vertical.Scrollbar.thumb', {'expand': '1', 'sticky': 'nswe'})],
                         'sticky': 'ns'})])
         style.configure('Vertical.TScrollbar', width=8)
-        scrollbar = ttk.Scrollbar(lists_frame, orient="vertical", command=self.task_tree.yview, style='Vertical.TScrollbar')
+        scrollbar = ttk.Scrollbar(lists_frame, orient="vertical", style='Vertical.TScrollbar')
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.task_tree.configure(yscrollcommand=scrollbar.set)
+        # 任务列表只创建可见区域的行，滚动条由虚拟列表控制
+        self.task_list = VirtualTaskList(self.task_tree, scrollbar, self.get_task_values)
 
         # 添加任务悬停预览功能
         self.tooltip = None
@@ -149,6 +228,14 @@ class BatTaskManagerApp:
         self.pause_var = tk.BooleanVar(value=False)
         self.pause_var_label = ttk.Checkbutton(left_btn_frame, text=self.language_manager.get_text("buttons.pause_between"), variable=self.pause_var)
         self.pause_var_label.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(left_btn_frame, text=self.language_manager.get_text("buttons.cancel_selected"), command=self.cancel_selected)
+        self.cancel_button.pack(side=tk.LEFT, padx=2)
+        self.timeout_label = ttk.Label(left_btn_frame, text=self.language_manager.get_text("buttons.timeout"))
+        self.timeout_label.pack(side=tk.LEFT, padx=(5, 2))
+        # 0 表示不限制执行时间
+        self.timeout_var = tk.StringVar(value="0")
+        self.timeout_spinbox = ttk.Spinbox(left_btn_frame, from_=0, to=86400, increment=10, width=6, textvariable=self.timeout_var)
+        self.timeout_spinbox.pack(side=tk.LEFT)
 
         # 右侧按钮组
         right_btn_frame = ttk.Frame(top_btn_frame)
@@ -172,6 +259,8 @@ class BatTaskManagerApp:
         self.show_frequent_var = tk.BooleanVar(value=False)
         self.show_frequent_var_label = ttk.Checkbutton(bottom_left_frame, text=self.language_manager.get_text("buttons.show_frequent"), variable=self.show_frequent_var, command=self.filter_frequent_tasks)
         self.show_frequent_var_label.pack(side=tk.LEFT, padx=5)
+        self.stats_button = ttk.Button(bottom_left_frame, text=self.language_manager.get_text("buttons.statistics"), command=self.show_statistics)
+        self.stats_button.pack(side=tk.LEFT, padx=2)
 
         # 右侧导入导出按钮
         bottom_right_frame = ttk.Frame(bottom_btn_frame)
@@ -207,6 +296,12 @@ class BatTaskManagerApp:
 
 
 
+    def set_editing_enabled(self, enabled):
+        """启用或禁用会写入任务库的按钮"""
+        state = "normal" if enabled else "disabled"
+        for button in (self.add_task_button, self.create_aggregate_button, self.import_button):
+            button.config(state=state)
+
     def add_task(self):
         name = self.task_name_entry.get().strip()
         command = self.bat_command_entry.get("1.0", tk.END).strip()
@@ -216,155 +311,286 @@ class BatTaskManagerApp:
             return
 
         if self.task_manager.add_task(name, command):
-            # 根据任务类型获取对应的语言文本
-            task_type = self.language_manager.get_text("task_type.aggregate") if "&&" in command else self.language_manager.get_text("task_type.normal")
-            self.task_tree.insert("", tk.END, values=(name, task_type, self.language_manager.get_text("task_status.waiting"), self.language_manager.get_text("task_list.no")))  # 使用语言文件中的否
+            self.insert_task_row(self.task_manager.get_task(name))
             self.task_name_entry.delete(0, tk.END)
             self.bat_command_entry.delete("1.0", tk.END)
         else:
             messagebox.showerror(self.language_manager.get_text("messages.name_exists"), self.language_manager.get_text("messages.name_exists"))
 
     def load_tasks(self):
-        tasks = self.task_manager.get_all_tasks()
-        for task in tasks:
-            task_type = self.language_manager.get_text("task_type.aggregate") if "&&" in task["command"] else self.language_manager.get_text("task_type.normal")
-            frequent = self.language_manager.get_text("task_list.yes") if task.get("frequent", False) else self.language_manager.get_text("task_list.no")
-            self.task_tree.insert("", tk.END, values=(task["name"], task_type, self.language_manager.get_text("task_status.waiting"), frequent))
+        self.task_order = list(self.task_manager.tasks)
+        self.apply_task_filter()
+
+    def build_task_values(self, task, status):
+        """根据任务和状态键生成列表行的显示内容"""
+        task_type = self.language_manager.get_text(f"task_type.{self.task_manager.get_task_type(task['name'])}")
+        frequent = self.language_manager.get_text("task_list.yes") if task.get("frequent", False) else self.language_manager.get_text("task_list.no")
+        return (task["name"], task_type, self.language_manager.get_text(status), frequent)
+
+    def get_task_values(self, task_name):
+        """获取任务行的显示内容，只在首次显示时生成"""
+        values = self.task_values.get(task_name)
+        if values is None:
+            task = self.task_manager.get_task(task_name) or {"name": task_name, "command": ""}
+            values = self.build_task_values(task, self.task_statuses.get(task_name, "task_status.waiting"))
+            self.task_values[task_name] = values
+        return values
+
+    def insert_task_row(self, task):
+        """把新任务加入列表模型，并滚动到该任务"""
+        self.task_order.append(task["name"])
+        self.apply_task_filter()
+        self.task_list.scroll_to(task["name"])
+
+    def remove_task_row(self, task_name):
+        """从列表模型中移除任务"""
+        self.task_order.remove(task_name)
+        self.task_statuses.pop(task_name, None)
+        self.task_values.pop(task_name, None)
+        self.apply_task_filter()
+
+    def refresh_task_row(self, task_name):
+        """按任务当前信息重新生成显示内容（常用标记、语言切换等）"""
+        self.task_values.pop(task_name, None)
+        self.task_list.refresh_name(task_name)
+
+    def clear_task_rows(self):
+        """清空任务列表模型"""
+        self.task_order = []
+        self.task_statuses.clear()
+        self.task_values.clear()
+        self.task_list.set_names([])
+
+    def apply_task_filter(self):
+        """按搜索框和常用过滤条件刷新列表；有搜索词时按相关度排序"""
+        search_text = self.search_entry.get().strip()
+        if search_text:
+            names = self.task_manager.search_task_names(search_text)
+        else:
+            names = self.task_order
+        if self.show_frequent_var.get():
+            names = [name for name in names if (self.task_manager.get_task(name) or {}).get("frequent", False)]
+        self.task_list.set_names(names)
 
     def run_selected(self):
-        selection = self.task_tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             messagebox.showwarning(self.language_manager.get_text("messages.select_execute"), self.language_manager.get_text("messages.select_execute"))
             return
 
-        task_name = self.task_tree.item(selection[0])["values"][0]
-        self.task_manager.run_task(task_name, self.update_task_status, self.update_log)
+        task_name = selection[0]
+        self.task_manager.run_task(task_name, self.post_task_status, self.post_log, self.get_timeout())
+
+    def get_timeout(self):
+        """获取界面设置的任务超时秒数，未设置时返回 None"""
+        try:
+            timeout = float(self.timeout_var.get())
+        except ValueError:
+            return None
+        return timeout if timeout > 0 else None
+
+    def cancel_selected(self):
+        selection = self.task_list.selected_names()
+        if not selection:
+            messagebox.showwarning(self.language_manager.get_text("messages.select_cancel"), self.language_manager.get_text("messages.select_cancel"))
+            return
+
+        for task_name in selection:
+            self.task_manager.cancel_task(task_name)
 
     def delete_selected(self):
-        selection = self.task_tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             messagebox.showwarning(self.language_manager.get_text("messages.select_delete"), self.language_manager.get_text("messages.select_delete"))
             return
 
-        task_name = self.task_tree.item(selection[0])["values"][0]
+        task_name = selection[0]
         self.task_manager.delete_task(task_name)
-        self.task_tree.delete(selection[0])
+        self.remove_task_row(task_name)
 
     def run_multiple(self):
-        selection = self.task_tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             messagebox.showwarning(self.language_manager.get_text("messages.select_execute"), self.language_manager.get_text("messages.select_execute"))
             return
 
-        task_names = [self.task_tree.item(item)["values"][0] for item in selection]
-        self.task_manager.run_multiple_tasks(task_names, self.update_task_status, self.update_log, self.pause_var.get())
+        task_names = selection
+        self.task_manager.run_multiple_tasks(task_names, self.post_task_status, self.post_log, self.pause_var.get(), timeout=self.get_timeout())
 
     def update_task_status(self, task_name, status):
-        # 更新任务状态显示
-        for item in self.task_tree.get_children():
-            name = self.task_tree.item(item, "values")[0]
-            if name == task_name:
-                task = self.task_manager.get_task(task_name)
-                if task:
-                    task_type = self.language_manager.get_text("task_type.aggregate") if "&&" in task["command"] else self.language_manager.get_text("task_type.normal")
-                    # 修改状态文本获取逻辑
-                    status_text = self.language_manager.get_text(status)
-                    frequent_text = self.language_manager.get_text("task_list.yes") if task.get("frequent", False) else self.language_manager.get_text("task_list.no")
-                    self.task_tree.item(item, values=(name, task_type, status_text, frequent_text))
-                    # 强制更新界面显示
-                    self.task_tree.update()
-                break
+        # 更新任务状态显示，只替换缓存行中的状态列；任务不可见时不触碰界面
+        self.task_statuses[task_name] = status
+        values = self.task_values.get(task_name)
+        if values is not None:
+            self.task_values[task_name] = (values[0], values[1], self.language_manager.get_text(status), values[3])
+        self.task_list.refresh_name(task_name)
 
     def set_as_frequent(self):
-        selection = self.task_tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             messagebox.showwarning(self.language_manager.get_text("messages.select_frequent"), self.language_manager.get_text("messages.select_frequent"))
             return
 
-        task_name = self.task_tree.item(selection[0])["values"][0]
+        task_name = selection[0]
         task = self.task_manager.get_task(task_name)
         if task:
             task["frequent"] = True
             self.task_manager.update_task(task_name, task)
-            # 根据当前语言设置常用标识
-            frequent_text = self.language_manager.get_text("task_list.yes")
-            self.task_tree.item(selection[0], values=(task_name, self.task_tree.item(selection[0])["values"][1], self.task_tree.item(selection[0])["values"][2], frequent_text))
+            self.refresh_task_row(task_name)
 
     def unset_as_frequent(self):
-        selection = self.task_tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             messagebox.showwarning(self.language_manager.get_text("messages.select_unfrequent"), self.language_manager.get_text("messages.select_unfrequent"))
             return
 
-        task_name = self.task_tree.item(selection[0])["values"][0]
+        task_name = selection[0]
         task = self.task_manager.get_task(task_name)
         if task:
             task["frequent"] = False
             self.task_manager.update_task(task_name, task)
-            # 根据当前语言设置常用标识
-            frequent_text = self.language_manager.get_text("task_list.no")
-            self.task_tree.item(selection[0], values=(task_name, self.task_tree.item(selection[0])["values"][1], self.task_tree.item(selection[0])["values"][2], frequent_text))
-
-    def update_log(self, message):
-        """更新日志内容"""
+            self.refresh_task_row(task_name)
+
+    def on_close(self):
+        """关闭窗口前写出缓冲中的日志"""
+        self.task_manager.shutdown()
+        self.log_manager.close()
+        self.root.destroy()
+
+    def post_task_status(self, task_name, status):
+        """登记任务状态变化（可在任意线程调用）"""
+        self.ui_events.append(("status", task_name, status, time.perf_counter()))
+
+    def post_log(self, message):
+        """登记一条日志（可在任意线程调用）"""
+        self.ui_events.append(("log", message))
+
+    def pump_ui_events(self):
+        """在主线程中批量处理工作线程提交的界面更新"""
+        lines = []
+        statuses = {}
+        posted = []
+        events = self.ui_events
+        for _ in range(self.ui_pump_batch):
+            try:
+                event = events.popleft()
+            except IndexError:
+                break
+            if event[0] == "log":
+                lines.append(event[1])
+            elif event[0] == "call":
+                event[1]()
+            else:
+                # 同一任务的多次状态变化只保留最后一次
+                statuses[event[1]] = event[2]
+                posted.append(event[3])
+
+        if lines:
+            self.update_log(lines)
+        for task_name, status in statuses.items():
+            self.update_task_status(task_name, status)
+        if posted:
+            # 状态从工作线程提交到显示在界面上的延迟
+            now = time.perf_counter()
+            for posted_at in posted:
+                self.task_manager.emit_metric(timing("ui_status_latency_seconds", now - posted_at))
+
+        self.root.after(1 if events else self.ui_pump_interval, self.pump_ui_events)
+
+    def show_statistics(self):
+        """打开执行统计面板，显示各项耗时的分布、计数器和最慢的任务"""
+        if self.stats_window and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        window = self.stats_window = tk.Toplevel(self.root)
+        window.title(self.language_manager.get_text("stats.title"))
+        window.geometry("720x480")
+
+        columns = ("metric", "count", "mean", "p50", "p95", "max")
+        self.stats_tree = ttk.Treeview(window, columns=columns, show="headings", height=12)
+        for column in columns:
+            self.stats_tree.heading(column, text=self.language_manager.get_text(f"stats.{column}"))
+            self.stats_tree.column(column, width=320 if column == "metric" else 70, anchor=tk.W if column == "metric" else tk.E)
+        self.stats_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        ttk.Label(window, text=self.language_manager.get_text("stats.slowest_tasks")).pack(anchor=tk.W, padx=5)
+        columns = ("task", "count", "mean", "max")
+        self.slow_tasks_tree = ttk.Treeview(window, columns=columns, show="headings", height=8)
+        for column in columns:
+            self.slow_tasks_tree.heading(column, text=self.language_manager.get_text(f"stats.{column}"))
+            self.slow_tasks_tree.column(column, width=320 if column == "task" else 70, anchor=tk.W if column == "task" else tk.E)
+        self.slow_tasks_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.refresh_statistics()
+
+    def refresh_statistics(self):
+        """统计面板打开期间定时刷新"""
+        if not (self.stats_window and self.stats_window.winfo_exists()):
+            self.stats_window = None
+            return
+        metrics = self.task_manager.metrics
+        histograms, counters = metrics.summary()
+        ms = lambda seconds: f"{seconds * 1000:.1f} ms"
+        rows = []
+        for name, labels, count, mean, p50, p95, longest in histograms:
+            label = ",".join(f"{key}={text}" for key, text in labels.items())
+            rows.append((f"{name}{{{label}}}" if label else name, count, ms(mean), ms(p50), ms(p95), ms(longest)))
+        for name, labels, value in counters:
+            label = ",".join(f"{key}={text}" for key, text in labels.items())
+            rows.append((f"{name}{{{label}}}" if label else name, value, "", "", "", ""))
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for row in rows:
+            self.stats_tree.insert("", tk.END, values=row)
+
+        self.slow_tasks_tree.delete(*self.slow_tasks_tree.get_children())
+        for task_name, count, mean, longest in metrics.slowest_tasks():
+            self.slow_tasks_tree.insert("", tk.END, values=(task_name, count, ms(mean), ms(longest)))
+        self.stats_window.after(self.stats_interval, self.refresh_statistics)
+
+    def update_log(self, lines):
+        """将一批日志一次性追加到日志框并写入日志文件"""
         # 临时启用编辑
         current_state = self.log_text.cget("state")
         self.log_text.configure(state="normal")
         
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines[-self.log_max_lines:]) + "\n")
+        # 只保留最近的日志行，完整输出在日志文件和任务输出文件中
+        line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        if line_count > self.log_max_lines:
+            self.log_text.delete("1.0", f"{line_count - self.log_max_lines + 1}.0")
         self.log_text.see(tk.END)
         
         # 恢复原始状态
         self.log_text.configure(state=current_state)
         
         # 同时写入日志文件
-        self.log_manager.write_log(message)
+        self.log_manager.write_logs(lines)
 
     def filter_frequent_tasks(self):
-        show_frequent = self.show_frequent_var.get()
-        # 获取所有任务项，包括被detach的项
-        all_items = self.task_tree.get_children("")
-        
-        if show_frequent:
-            # 显示常用任务时，只显示标记为常用的任务
-            for item in all_items:
-                task_name = self.task_tree.item(item)["values"][0]
-                task = self.task_manager.get_task(task_name)
-                if task and task.get("frequent", False):
-                    self.task_tree.reattach(item, "", tk.END)
-                else:
-                    self.task_tree.detach(item)
-        else:
-            # 不显示常用任务时，显示所有任务
-            tasks = self.task_manager.get_all_tasks()
-            # 清空当前显示的任务
-            for item in self.task_tree.get_children():
-                self.task_tree.delete(item)
-            # 重新加载所有任务
-            for task in tasks:
-                task_type = self.language_manager.get_text("task_type.aggregate") if "&&" in task["command"] else self.language_manager.get_text("task_type.normal")
-                frequent = self.language_manager.get_text("task_list.yes") if task.get("frequent", False) else self.language_manager.get_text("task_list.no")
-                self.task_tree.insert("", tk.END, values=(task["name"], task_type, self.language_manager.get_text("task_status.waiting"), frequent))
+        self.apply_task_filter()
 
     def search_tasks(self, event=None):
-        search_text = self.search_entry.get().strip().lower()
-        for item in self.task_tree.get_children():
-            task_name = self.task_tree.item(item)['values'][0].lower()
-            if search_text in task_name:
-                self.task_tree.reattach(item, '', tk.END)
-            else:
-                self.task_tree.detach(item)
+        # 输入停顿后再搜索，连续输入时只执行最后一次
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(self.search_delay, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        self.apply_task_filter()
 
     def import_tasks(self):
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
         if file_path:
             if self.data_manager.import_tasks(file_path):
+                self.task_manager.reload_tasks()
                 self.refresh_task_list()
                 messagebox.showinfo("Success", self.language_manager.get_text("messages.import_success"))
             else:
                 messagebox.showerror("Error", self.language_manager.get_text("messages.import_failed"))
 
     def export_tasks(self):
+        from tkinter import filedialog
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
             if self.data_manager.export_tasks(file_path):
@@ -374,7 +600,7 @@ class BatTaskManagerApp:
 
     def create_aggregate(self):
         name = self.aggregate_name_entry.get().strip()
-        selected = self.task_tree.selection()
+        selected = self.task_list.selected_names()
         
         if not name:
             messagebox.showerror(self.language_manager.get_text("messages.empty_aggregate"), self.language_manager.get_text("messages.empty_aggregate"))
@@ -384,60 +610,59 @@ class BatTaskManagerApp:
             messagebox.showwarning(self.language_manager.get_text("messages.select_aggregate"), self.language_manager.get_text("messages.select_aggregate"))
             return
             
-        commands = []
-        for item in selected:
-            task_name = self.task_tree.item(item)["values"][0]
-            task = self.task_manager.get_task(task_name)
-            if task:
-                commands.append(task["command"])
-                
-        if commands:
-            aggregate_command = " && ".join(commands)
-            if self.task_manager.add_task(name, aggregate_command):
-                self.task_tree.insert("", tk.END, values=(name, self.language_manager.get_text("task_type.aggregate"), self.language_manager.get_text("task_status.waiting"), self.language_manager.get_text("task_list.no")))
+        # 默认按选中顺序串联依赖；勾选并行时各步骤互不依赖
+        steps = []
+        for task_name in selected:
+            if self.task_manager.get_task(task_name):
+                depends_on = [] if self.parallel_aggregate_var.get() or not steps else [steps[-1]["task"]]
+                steps.append({"task": task_name, "depends_on": depends_on})
+
+        if steps:
+            try:
+                added = self.task_manager.add_aggregate(name, steps, self.session_aggregate_var.get())
+            except ValueError as e:
+                messagebox.showerror(self.language_manager.get_text("messages.invalid_aggregate").format(str(e)), self.language_manager.get_text("messages.invalid_aggregate").format(str(e)))
+                return
+            if added:
+                self.insert_task_row(self.task_manager.get_task(name))
                 self.aggregate_name_entry.delete(0, tk.END)
             else:
                 messagebox.showerror(self.language_manager.get_text("messages.aggregate_exists"), self.language_manager.get_text("messages.aggregate_exists"))
 
     def clear_search(self):
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
         self.search_entry.delete(0, tk.END)
-        # 重新加载所有任务
-        tasks = self.task_manager.get_all_tasks()
-        # 清空当前显示的任务
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
-        # 重新显示所有任务
-        for task in tasks:
-            task_type = self.language_manager.get_text("task_type.aggregate") if "&&" in task["command"] else self.language_manager.get_text("task_type.normal")
-            frequent = self.language_manager.get_text("task_list.yes") if task.get("frequent", False) else self.language_manager.get_text("task_list.no")
-            self.task_tree.insert("", tk.END, values=(task["name"], task_type, self.language_manager.get_text("task_status.waiting"), frequent))
-        # 如果当前是显示常用任务模式，则应用过滤
-        if self.show_frequent_var.get():
-            self.filter_frequent_tasks()
+        # 重新显示所有任务（如果当前是显示常用任务模式，则仍然过滤）
+        self.apply_task_filter()
 
     def move_task_up(self, tree):
-        selection = tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             return
 
-        for item in selection:
-            idx = tree.index(item)
-            if idx > 0:
-                tree.move(item, tree.parent(item), idx - 1)
+        for task_name in selection:
+            idx = self.task_order.index(task_name)
+            if idx > 0 and self.task_order[idx - 1] not in selection:
+                self.task_order[idx - 1], self.task_order[idx] = self.task_order[idx], self.task_order[idx - 1]
+        self.apply_task_filter()
+        self.task_list.scroll_to(selection[0])
 
     def move_task_down(self, tree):
-        selection = tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             return
 
-        for item in reversed(selection):
-            idx = tree.index(item)
-            if idx < len(tree.get_children()) - 1:
-                tree.move(item, tree.parent(item), idx + 1)
+        for task_name in reversed(selection):
+            idx = self.task_order.index(task_name)
+            if idx < len(self.task_order) - 1 and self.task_order[idx + 1] not in selection:
+                self.task_order[idx + 1], self.task_order[idx] = self.task_order[idx], self.task_order[idx + 1]
+        self.apply_task_filter()
+        self.task_list.scroll_to(selection[-1])
 
     def refresh_task_list(self):
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
+        self.clear_task_rows()
         self.load_tasks()
 
     def show_command_preview(self, event):
@@ -457,7 +682,7 @@ class BatTaskManagerApp:
         if self.tooltip:
             item = self.task_tree.identify('item', event.x, event.y)
             if item:
-                task_name = self.task_tree.item(item)['values'][0]
+                task_name = self.task_list.name_of(item)
                 task = self.task_manager.get_task(task_name)
                 if task:
                     self.tooltip_label.config(text=f"指令: {task['command']}")
@@ -467,7 +692,7 @@ class BatTaskManagerApp:
 
     def execute_selected_tasks(self, event=None):
         """响应Enter键执行选中的任务"""
-        selection = self.task_tree.selection()
+        selection = self.task_list.selected_names()
         if not selection:
             return
         
@@ -527,25 +752,8 @@ class BatTaskManagerApp:
         self.task_tree.heading("frequent", text=self.language_manager.get_text("task_list.frequent"))
 
         # 更新任务列表中的文本
-        for item in self.task_tree.get_children():
-            values = self.task_tree.item(item)["values"]
-            if values:
-                name = values[0]
-                task = self.task_manager.get_task(name)
-                if task:
-                    # 根据任务类型获取对应的语言文本
-                    task_type = self.language_manager.get_text("task_type.aggregate") if "&&" in task["command"] else self.language_manager.get_text("task_type.normal")
-                    
-                    # 获取当前状态对应的语言文本
-                    status = values[2].lower() if values[2] else "waiting"
-                    status_key = status.split('.')[-1] if '.' in status else status
-                    status_text = self.language_manager.get_text(f"task_status.{status_key}")
-                    
-                    # 获取常用标识对应的语言文本
-                    frequent_text = self.language_manager.get_text("task_list.yes") if task.get("frequent", False) else self.language_manager.get_text("task_list.no")
-                    
-                    # 更新列表项的显示文本
-                    self.task_tree.item(item, values=(name, task_type, status_text, frequent_text))
+        self.task_values.clear()
+        self.task_list.render()
 
         # 自适应调整列宽
         for col in ("name", "type", "status", "frequent"):
@@ -553,11 +761,8 @@ class BatTaskManagerApp:
             self.task_tree.update()
             
             # 获取列中所有值的最大宽度
-            content_widths = []
-            for item in self.task_tree.get_children():
-                col_idx = ("name", "type", "status", "frequent").index(col)
-                value = str(self.task_tree.item(item)["values"][col_idx])
-                content_widths.append(len(value) * 15)
+            col_idx = ("name", "type", "status", "frequent").index(col)
+            content_widths = [len(str(values[col_idx])) * 15 for values in self.task_values.values()]
             
             width = max(
                 self.task_tree.column(col, "width"),  # 当前宽度
@@ -571,6 +776,8 @@ class BatTaskManagerApp:
         self.delete_button.config(text=self.language_manager.get_text("buttons.delete_selected"))
         self.batch_execute_button.config(text=self.language_manager.get_text("buttons.batch_execute"))
         self.pause_var_label.config(text=self.language_manager.get_text("buttons.pause_between"))
+        self.cancel_button.config(text=self.language_manager.get_text("buttons.cancel_selected"))
+        self.timeout_label.config(text=self.language_manager.get_text("buttons.timeout"))
         self.import_button.config(text=self.language_manager.get_text("buttons.import_tasks"))
         self.export_button.config(text=self.language_manager.get_text("buttons.export_tasks"))
         self.move_up_button.config(text=self.language_manager.get_text("buttons.move_up"))
@@ -578,6 +785,7 @@ class BatTaskManagerApp:
         self.set_frequent_button.config(text=self.language_manager.get_text("buttons.set_frequent"))
         self.unset_frequent_button.config(text=self.language_manager.get_text("buttons.unset_frequent"))
         self.show_frequent_var_label.config(text=self.language_manager.get_text("buttons.show_frequent"))
+        self.stats_button.config(text=self.language_manager.get_text("buttons.statistics"))
 
         # 更新标签文本
         self.task_name_label.config(text=self.language_manager.get_text("task_name"))
@@ -585,6 +793,8 @@ class BatTaskManagerApp:
         self.add_task_button.config(text=self.language_manager.get_text("add_task"))
         self.aggregate_name_label.config(text=self.language_manager.get_text("aggregate_name"))
         self.create_aggregate_button.config(text=self.language_manager.get_text("create_aggregate"))
+        self.parallel_aggregate_checkbox.config(text=self.language_manager.get_text("buttons.parallel_aggregate"))
+        self.session_aggregate_checkbox.config(text=self.language_manager.get_text("buttons.session_aggregate"))
         self.search_label.config(text=self.language_manager.get_text("search_task"))
         self.clear_search_button.config(text=self.language_manager.get_text("clear_search"))
         self.log_label.config(text=self.language_manager.get_text("log_title"))
@@ -595,7 +805,8 @@ class BatTaskManagerApp:
         ttk.Label(menu_frame, text=self.language_manager.get_text("language")).pack(side=tk.LEFT, padx=5)
 
 if __name__ == "__main__":
-    import sys
+    profiler = StartupProfiler("--profile-startup" in sys.argv, STARTUP_BEGIN)
+    profiler.mark("imports")
     if getattr(sys, 'frozen', False):
         # 如果是打包后的exe运行，隐藏控制台窗口
         import win32gui
@@ -604,5 +815,6 @@ if __name__ == "__main__":
         win32gui.ShowWindow(hwnd, win32con.SW_HIDE)
     
     root = tk.Tk()
-    app = BatTaskManagerApp(root)
+    profiler.mark("tk_init")
+    app = BatTaskManagerApp(root, profiler)
     root.mainloop()
\ No newline at end of file
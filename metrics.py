@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+# 耗时直方图的默认分桶上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# 指标说明，用于 Prometheus 文本中的 HELP 行
+DESCRIPTIONS = {
+    "task_queue_wait_seconds": "Time a task waited in the batch queue before it started",
+    "task_duration_seconds": "Task run time",
+    "command_duration_seconds": "Run time of each spawned command",
+    "process_spawn_seconds": "Time spent starting a command process",
+    "status_callback_seconds": "Time spent in status callbacks",
+    "ui_status_latency_seconds": "Delay between a status change and the GUI showing it",
+    "tasks_total": "Finished task runs",
+    "output_bytes_total": "Bytes of command output",
+    "result_cache_hits_total": "Runs skipped because their inputs were unchanged",
+}
+
+class MetricsHook:
+    """指标事件接口，TaskManager 通过 add_metrics_hook 注册
+
+    每个事件为 {"type": "timing"/"counter", "name": 名称, "value": 数值,
+    "labels": {标签: 值}, "time": 时间戳}。record 在执行任务的线程中调用，应尽快返回。
+    """
+    def record(self, event):
+        raise NotImplementedError
+
+class Histogram:
+    """固定分桶的直方图"""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """按分桶估算分位数，返回所在分桶的上限（不超过观测到的最大值）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = ('{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+               for key, value in items)
+    return "{" + ",".join(escaped) + "}"
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry(MetricsHook):
+    """在进程内汇总指标事件：耗时进入直方图，计数器累加，并记录每个任务的耗时统计"""
+    def __init__(self, prefix="cmdmanager_"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}  # (名称, 标签) -> Histogram
+        self.counters = {}  # (名称, 标签) -> 数值
+        self.task_durations = {}  # 任务名 -> [次数, 总耗时, 最大耗时]
+
+    def record(self, event):
+        labels = tuple(sorted(event.get("labels", {}).items()))
+        key = (event["name"], labels)
+        with self.lock:
+            if event["type"] == "timing":
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram()
+                histogram.observe(event["value"])
+                if event["name"] == "task_duration_seconds" and "task" in event:
+                    stats = self.task_durations.setdefault(event["task"], [0, 0.0, 0.0])
+                    stats[0] += 1
+                    stats[1] += event["value"]
+                    stats[2] = max(stats[2], event["value"])
+            else:
+                self.counters[key] = self.counters.get(key, 0) + event["value"]
+
+    def summary(self):
+        """返回直方图摘要 [(名称, 标签, 次数, 平均值, p50, p95, 最大值), ...] 和计数器 [(名称, 标签, 数值), ...]"""
+        with self.lock:
+            histograms = [
+                (name, dict(labels), h.count, h.sum / h.count if h.count else 0.0, h.quantile(0.5), h.quantile(0.95), h.max)
+                for (name, labels), h in sorted(self.histograms.items())
+            ]
+            counters = [(name, dict(labels), value) for (name, labels), value in sorted(self.counters.items())]
+        return histograms, counters
+
+    def slowest_tasks(self, limit=10):
+        """按平均耗时返回最慢的任务 [(任务名, 次数, 平均耗时, 最大耗时), ...]"""
+        with self.lock:
+            stats = [(name, count, total / count, longest) for name, (count, total, longest) in self.task_durations.items()]
+        return sorted(stats, key=lambda item: item[2], reverse=True)[:limit]
+
+    def to_prometheus(self):
+        """生成 Prometheus 文本格式"""
+        lines = []
+        with self.lock:
+            by_name = {}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                by_name.setdefault(name, []).append((labels, histogram))
+            for name, series in by_name.items():
+                full_name = self.prefix + name
+                lines.append(f"# HELP {full_name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, histogram in series:
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_number(histogram.sum)}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+            by_name = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                by_name.setdefault(name, []).append((labels, value))
+            for name, series in by_name.items():
+                full_name = self.prefix + name
+                lines.append(f"# HELP {full_name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full_name} counter")
+                for labels, value in series:
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """原子地写出 Prometheus 文本文件，供 node_exporter 的 textfile 收集器读取"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.task_durations.clear()
+
+def timing(name, value, labels=None, **extra):
+    """构造耗时事件"""
+    event = {"type": "timing", "name": name, "value": value, "labels": labels or {}, "time": time.time()}
+    event.update(extra)
+    return event
+
+def counter(name, value=1, labels=None):
+    """构造计数事件"""
+    return {"type": "counter", "name": name, "value": value, "labels": labels or {}, "time": time.time()}
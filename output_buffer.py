@@ -0,0 +1,71 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+
+class OutputBuffer:
+    """单次任务执行的输出环形缓冲区
+
+    内存中只保留最近 max_lines 行且不超过 max_bytes 字节，超出时丢弃最早的行；
+    指定 spill_file 时完整输出同时追加写入该文件。
+    """
+    def __init__(self, max_lines=1000, max_bytes=1024 * 1024, spill_file=None):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.spill_file = spill_file
+        self.lines = deque()
+        self.sizes = deque()
+        self.bytes = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self._file = None
+
+    def append(self, line):
+        size = len(line.encode('utf-8'))
+        with self.lock:
+            self.lines.append(line)
+            self.sizes.append(size)
+            self.bytes += size
+            while len(self.lines) > self.max_lines or (self.bytes > self.max_bytes and len(self.lines) > 1):
+                self.lines.popleft()
+                self.bytes -= self.sizes.popleft()
+                self.dropped += 1
+            if self.spill_file:
+                try:
+                    if self._file is None:
+                        os.makedirs(os.path.dirname(self.spill_file) or ".", exist_ok=True)
+                        self._file = open(self.spill_file, 'a', encoding='utf-8')
+                    self._file.write(line + "\n")
+                except OSError:
+                    # 写盘失败时只保留内存中的输出
+                    self.spill_file = None
+
+    def get_lines(self):
+        """返回内存中保留的输出行"""
+        with self.lock:
+            return list(self.lines)
+
+    def close(self):
+        with self.lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+def spill_path(output_dir, task_name, keep=10, suffix=".log"):
+    """生成任务本次执行的完整输出文件路径，并删除该任务较早的输出文件，只保留最近 keep 个"""
+    prefix = re.sub(r'[\\/:*?"<>|\s]', "_", task_name) + "-"
+    pattern = re.compile(re.escape(prefix) + r"\d{8}-\d{6}-\d{3}" + re.escape(suffix) + "$")
+    now = time.time()
+    path = os.path.join(output_dir, "{}{}-{:03d}{}".format(
+        prefix, time.strftime("%Y%m%d-%H%M%S", time.localtime(now)), int(now * 1000) % 1000, suffix))
+    try:
+        old = sorted(name for name in os.listdir(output_dir) if pattern.match(name))
+    except OSError:
+        return path
+    for name in old[:max(0, len(old) - keep + 1)]:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except OSError:
+            pass
+    return path
@@ -0,0 +1,193 @@
+import asyncio
+import codecs
+import os
+import selectors
+import subprocess
+import threading
+import time
+
+class _Watch:
+    """一个子进程的 stdout/stderr 读取状态"""
+    def __init__(self, on_line, on_chunk):
+        self.on_line = on_line
+        self.on_chunk = on_chunk
+        self.open_streams = 0
+        self.returncode = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        """等待两个管道都读到 EOF（由反应器启动的进程还需等待进程退出）"""
+        return self.done.wait(timeout)
+
+    def close_one(self):
+        self.open_streams -= 1
+        if self.open_streams == 0:
+            self.done.set()
+
+class _Stream:
+    def __init__(self, watch, name):
+        self.watch = watch
+        self.name = name
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.pending = ""
+
+def _emit(stream, line, timestamp):
+    """回调异常不能中断反应器线程，否则所有进程的输出都会停止"""
+    try:
+        stream.watch.on_line(stream.name, line, timestamp)
+    except Exception:
+        pass
+
+def _feed(stream, data, timestamp):
+    """处理读到的数据块，回调其中完整的行"""
+    if stream.watch.on_chunk:
+        stream.watch.on_chunk(stream.name, len(data))
+    text = stream.pending + stream.decoder.decode(data)
+    lines = text.split("\n")
+    stream.pending = lines.pop()
+    for line in lines:
+        _emit(stream, line, timestamp)
+
+def _finish(stream, timestamp):
+    """管道读到 EOF：回调最后不完整的一行"""
+    tail = stream.pending + stream.decoder.decode(b"", final=True)
+    if tail:
+        _emit(stream, tail, timestamp)
+    stream.watch.close_one()
+
+class OutputReactor:
+    """用一个线程通过 selectors 多路复用所有子进程的输出管道
+
+    按块读取并增量切分行，stdout 与 stderr 的行按到达顺序回调，
+    回调参数为 (stream, line, timestamp)。仅支持 POSIX 管道。
+    """
+    def __init__(self, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.pending = []
+        self.thread = None
+        # 通过自管道唤醒 select，让新注册的管道立即生效
+        self.wakeup_read, self.wakeup_write = os.pipe()
+        os.set_blocking(self.wakeup_read, False)
+        self.selector.register(self.wakeup_read, selectors.EVENT_READ, None)
+
+    def watch(self, process, on_line, on_chunk=None):
+        """开始读取进程的 stdout/stderr，返回可 wait() 的句柄
+
+        on_chunk(stream, size) 在每次读到数据块时调用，可用于统计字节数。
+        """
+        watch = _Watch(on_line, on_chunk)
+        streams = [(pipe, name) for pipe, name in ((process.stdout, 'stdout'), (process.stderr, 'stderr')) if pipe]
+        watch.open_streams = len(streams)
+        if not streams:
+            watch.done.set()
+            return watch
+
+        with self.lock:
+            for pipe, name in streams:
+                os.set_blocking(pipe.fileno(), False)
+                self.pending.append((pipe, _Stream(watch, name)))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="output-reactor")
+                self.thread.daemon = True
+                self.thread.start()
+        os.write(self.wakeup_write, b"\0")
+        return watch
+
+    def _run(self):
+        while True:
+            for key, _ in self.selector.select():
+                if key.data is None:
+                    self._drain_wakeup()
+                else:
+                    self._read(key.fileobj, key.data)
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self.wakeup_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for pipe, stream in pending:
+            self.selector.register(pipe, selectors.EVENT_READ, stream)
+
+    def _read(self, pipe, stream):
+        try:
+            data = os.read(pipe.fileno(), self.chunk_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        timestamp = time.time()
+
+        if data:
+            _feed(stream, data, timestamp)
+            return
+
+        # EOF：输出最后不完整的一行并关闭管道
+        self.selector.unregister(pipe)
+        _finish(stream, timestamp)
+        pipe.close()
+
+class _SubprocessProtocol(asyncio.SubprocessProtocol):
+    def __init__(self, watch):
+        self.watch = watch
+        self.streams = {1: _Stream(watch, 'stdout'), 2: _Stream(watch, 'stderr')}
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def pipe_data_received(self, fd, data):
+        _feed(self.streams[fd], data, time.time())
+
+    def pipe_connection_lost(self, fd, exc):
+        if fd in self.streams:
+            _finish(self.streams.pop(fd), time.time())
+
+    def process_exited(self):
+        self.watch.returncode = self.transport.get_returncode()
+        self.watch.close_one()
+
+class EventLoopOutputReactor:
+    """用一个线程运行 asyncio 事件循环，由它启动子进程并读取所有子进程的输出管道
+
+    用于 Windows：管道不支持 select，ProactorEventLoop 通过 IOCP 在一个线程中
+    完成所有管道的读取，不再为每个管道创建读取线程。进程需要由事件循环创建
+    （以重叠 I/O 方式打开管道），因此通过 spawn 启动。回调方式与 OutputReactor 相同。
+    """
+    def __init__(self, loop_factory=None):
+        self.loop_factory = loop_factory or (asyncio.ProactorEventLoop if os.name == "nt" else asyncio.new_event_loop)
+        self.loop = None
+        self.lock = threading.Lock()
+
+    def _get_loop(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = self.loop_factory()
+                thread = threading.Thread(target=self.loop.run_forever, name="output-reactor")
+                thread.daemon = True
+                thread.start()
+            return self.loop
+
+    def spawn(self, command, on_line, on_chunk=None, **kwargs):
+        """通过 shell 启动进程并开始读取其 stdout/stderr，返回 (subprocess.Popen, 句柄)
+
+        句柄的 wait() 在两个管道都读到 EOF 且进程退出后返回，退出码为其 returncode。
+        """
+        watch = _Watch(on_line, on_chunk)
+        # stdout、stderr 两个管道和进程本身
+        watch.open_streams = 3
+        future = asyncio.run_coroutine_threadsafe(self._spawn(command, watch, kwargs), self._get_loop())
+        return future.result(), watch
+
+    async def _spawn(self, command, watch, kwargs):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.subprocess_shell(
+            lambda: _SubprocessProtocol(watch), command,
+            stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+        )
+        return transport.get_extra_info('subprocess')
@@ -0,0 +1,32 @@
+import os
+import signal
+import subprocess
+
+def group_kwargs():
+    """创建子进程的参数：让子进程成为新进程组的组长，以便整体结束其进程树"""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+def signal_tree(pid, force=False):
+    """向进程及其子进程发送结束信号，force 为 True 时强制结束"""
+    if os.name == "nt":
+        args = ["taskkill", "/T", "/PID", str(pid)] + (["/F"] if force else [])
+        subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def kill_tree(process, grace=5):
+    """先请求整个进程树退出，超过 grace 秒仍未退出则强制结束"""
+    if process.poll() is None:
+        signal_tree(process.pid)
+        try:
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            signal_tree(process.pid, force=True)
+    if os.name != "nt":
+        # 进程组中可能还有仍持有输出管道的子进程
+        signal_tree(process.pid, force=True)
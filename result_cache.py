@@ -0,0 +1,152 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class ResultCache:
+    """按输入指纹缓存任务的成功结果
+
+    任务可声明 inputs（文件、目录或 glob 模式）和 env（环境变量名），指纹由
+    任务指令、输入文件内容和环境变量值计算。文件的 mtime 和大小未变化时复用
+    已保存的文件摘要，不重新读取文件。缓存按最近使用时间淘汰，条目数不超过
+    max_entries，保存的输出总量不超过 max_bytes。
+    """
+    def __init__(self, cache_file="cache.db", max_entries=1000, max_bytes=50 * 1024 * 1024):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.file_digests = {}  # 路径 -> (mtime_ns, size, 摘要)
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS results (
+                    fingerprint TEXT PRIMARY KEY,
+                    task_name TEXT NOT NULL,
+                    exit_code INTEGER NOT NULL,
+                    output TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used);
+                CREATE TABLE IF NOT EXISTS file_digests (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    digest TEXT NOT NULL
+                );
+            """)
+
+    @staticmethod
+    def is_cacheable(task):
+        """任务是否声明了输入"""
+        return bool(task.get("inputs") or task.get("env"))
+
+    def _file_digest(self, path):
+        """计算文件摘要，mtime 和大小未变化时直接使用已保存的摘要"""
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.file_digests.get(path)
+        if cached is None:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT mtime_ns, size, digest FROM file_digests WHERE path = ?", (path,)
+                ).fetchone()
+            if row:
+                cached = self.file_digests[path] = tuple(row)
+        if cached and cached[:2] == key:
+            return cached[2]
+
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        self.file_digests[path] = key + (digest,)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO file_digests (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                (path, key[0], key[1], digest)
+            )
+        return digest
+
+    def _expand(self, pattern):
+        """展开 glob 模式，目录包含其下的全部文件"""
+        files = []
+        for path in glob.glob(os.path.expanduser(pattern), recursive=True):
+            if os.path.isdir(path):
+                for root, dirs, names in os.walk(path):
+                    dirs.sort()
+                    files.extend(os.path.join(root, name) for name in sorted(names))
+            elif os.path.isfile(path):
+                files.append(path)
+        return sorted(set(os.path.abspath(path) for path in files))
+
+    def fingerprint(self, task):
+        """计算任务的输入指纹；任务未声明输入时返回 None"""
+        if not self.is_cacheable(task):
+            return None
+        h = hashlib.sha256()
+        h.update(json.dumps([task["name"], task.get("command", "")], ensure_ascii=False).encode("utf-8"))
+        for pattern in task.get("inputs", []):
+            h.update(b"\0pattern\0" + pattern.encode("utf-8"))
+            for path in self._expand(pattern):
+                h.update(b"\0" + path.encode("utf-8") + b"\0" + self._file_digest(path).encode("ascii"))
+        for key in sorted(task.get("env", [])):
+            value = os.environ.get(key)
+            h.update(b"\0env\0" + key.encode("utf-8") + (b"\1" + value.encode("utf-8") if value is not None else b"\0"))
+        return h.hexdigest()
+
+    def get(self, fingerprint):
+        """查找缓存结果 {"exit_code", "output", "created"}，命中时更新最近使用时间"""
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT exit_code, output, created FROM results WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE results SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+        return {"exit_code": row[0], "output": json.loads(row[1]), "created": row[2]}
+
+    def put(self, fingerprint, task_name, exit_code, output):
+        """保存执行结果并按最近使用时间淘汰超出限制的条目"""
+        data = json.dumps(list(output), ensure_ascii=False)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (fingerprint, task_name, exit_code, output, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint, task_name, exit_code, data, len(data), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        expired = []
+        for fingerprint, size in self.conn.execute("SELECT fingerprint, size FROM results ORDER BY last_used"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            expired.append((fingerprint,))
+            count -= 1
+            total -= size
+        self.conn.executemany("DELETE FROM results WHERE fingerprint = ?", expired)
+
+    def clear(self):
+        """清空缓存的结果"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM results")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,111 @@
+from collections import Counter
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TaskSearchIndex:
+    """任务名称和指令文本的三元组倒排索引，支持增量更新和模糊排序"""
+    # 排序权重：名称完全匹配 > 名称前缀 > 名称包含 > 指令包含 > 模糊匹配
+    EXACT, PREFIX, NAME, COMMAND, FUZZY = 400, 300, 200, 100, 50
+
+    def __init__(self, min_similarity=0.5):
+        self.min_similarity = min_similarity
+        self.names = {}  # 任务名 -> 小写名称
+        self.commands = {}  # 任务名 -> 小写指令
+        self.order = {}  # 任务名 -> 加入顺序，用于同分时稳定排序
+        self.name_grams = {}
+        self.command_grams = {}
+        self._counter = 0
+
+    def rebuild(self, tasks):
+        """用任务序列重建索引"""
+        self.__init__(self.min_similarity)
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task):
+        """加入或更新任务"""
+        name = task["name"]
+        if name in self.names:
+            self.remove(name)
+        lower_name = name.lower()
+        lower_command = task.get("command", "").lower()
+        self.names[name] = lower_name
+        self.commands[name] = lower_command
+        self.order[name] = self._counter
+        self._counter += 1
+        for grams, text in ((self.name_grams, lower_name), (self.command_grams, lower_command)):
+            for gram in _trigrams(text):
+                postings = grams.get(gram)
+                if postings is None:
+                    grams[gram] = {name}
+                else:
+                    postings.add(name)
+
+    def remove(self, name):
+        """移除任务"""
+        lower_name = self.names.pop(name, None)
+        lower_command = self.commands.pop(name, None)
+        self.order.pop(name, None)
+        if lower_name is None:
+            return
+        for grams, text in ((self.name_grams, lower_name), (self.command_grams, lower_command)):
+            for gram in _trigrams(text):
+                postings = grams.get(gram)
+                if postings:
+                    postings.discard(name)
+                    if not postings:
+                        del grams[gram]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _score(self, name, query):
+        lower_name = self.names[name]
+        if lower_name == query:
+            return self.EXACT
+        if lower_name.startswith(query):
+            return self.PREFIX
+        if query in lower_name:
+            return self.NAME
+        if query in self.commands[name]:
+            return self.COMMAND
+        return 0
+
+    def search(self, query, limit=None):
+        """返回按相关度排序的任务名列表"""
+        query = query.strip().lower()
+        if not query:
+            return sorted(self.names, key=self.order.get)[:limit]
+
+        grams = _trigrams(query)
+        scores = {}
+        if not grams:
+            # 少于三个字符时直接扫描名称和指令
+            candidates = self.names
+        else:
+            # 包含全部三元组的任务才可能包含查询串，从最短的倒排表开始求交集
+            candidates = set()
+            for grams_index in (self.name_grams, self.command_grams):
+                postings = sorted((grams_index.get(gram, set()) for gram in grams), key=len)
+                candidates |= postings[0].intersection(*postings[1:])
+        for name in candidates:
+            score = self._score(name, query)
+            if score:
+                scores[name] = score
+
+        if grams and (limit is None or len(scores) < limit):
+            # 模糊匹配：按名称共有三元组比例打分，跳过过于常见的三元组
+            shared = Counter()
+            common = max(1000, len(self.names) // 10)
+            for gram in grams:
+                postings = self.name_grams.get(gram, ())
+                if len(postings) <= common:
+                    shared.update(postings)
+            for name, count in shared.items():
+                similarity = count / len(grams)
+                if name not in scores and similarity >= self.min_similarity:
+                    scores[name] = self.FUZZY * similarity
+
+        ranked = sorted(scores, key=lambda name: (-scores[name], self.order[name]))
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,108 @@
+import subprocess
+import threading
+import uuid
+from process_control import group_kwargs, kill_tree
+
+class ShellSession:
+    """常驻的 shell 进程，依次执行多条指令，指令之间保留工作目录和环境变量
+
+    每条指令之后向 stdout 和 stderr 各写一行分隔标记，stdout 的标记中带有
+    指令的退出码，据此划分每条指令的输出并取得其退出码。POSIX 下指令通过 eval
+    执行，引号或 here-document 未结束时只会使该指令出错，不会吞掉分隔标记。
+    """
+    def __init__(self, windows=False):
+        self.windows = windows
+        self.marker = "__CMDMANAGER_{}__".format(uuid.uuid4().hex)
+        args = ["cmd", "/D", "/Q", "/K", "@echo off"] if windows else ["/bin/sh"]
+        self.process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            **group_kwargs()
+        )
+        self.on_line = None
+        self.return_code = None
+        # 当前指令各输出流的字节数，不含分隔标记及其前面补充的换行
+        self.output_bytes = {'stdout': 0, 'stderr': 0}
+        self.closed = False
+        self.stdout_done = threading.Event()
+        self.stderr_done = threading.Event()
+        for pipe, stream, done in ((self.process.stdout, 'stdout', self.stdout_done),
+                                   (self.process.stderr, 'stderr', self.stderr_done)):
+            thread = threading.Thread(target=self._read, args=(pipe, stream, done))
+            thread.daemon = True
+            thread.start()
+
+    def _read(self, pipe, stream, done):
+        for line in iter(pipe.readline, ''):
+            text = line.rstrip("\r\n")
+            if text.startswith(self.marker):
+                # 标记前补充的换行已计入上一行（或单独的空行），从字节数中扣除
+                self.output_bytes[stream] = max(0, self.output_bytes[stream] - 1)
+                if stream == 'stdout':
+                    try:
+                        self.return_code = int(text[len(self.marker):])
+                    except ValueError:
+                        self.return_code = -1
+                done.set()
+                continue
+            self.output_bytes[stream] += len(line.encode('utf-8'))
+            on_line = self.on_line
+            if on_line:
+                on_line(stream, line)
+        # shell 已退出（例如指令中执行了 exit 或会话被终止）
+        self.closed = True
+        self.stdout_done.set()
+        self.stderr_done.set()
+
+    def _script(self, command):
+        if self.windows:
+            return (f"{command}\n"
+                    f"echo.&echo {self.marker}%errorlevel%\n"
+                    f"(echo.&echo {self.marker})1>&2\n")
+        # 指令的标准输入重定向到 /dev/null，避免读取后续写入会话的脚本；
+        # 通过 eval 执行，指令中未结束的引号不会延续到后面的标记
+        quoted = "'" + command.replace("'", "'\\''") + "'"
+        return (f"{{ eval {quoted}\n}} </dev/null\n"
+                f"__cmdmanager_rc=$?\n"
+                f"printf '\\n%s%d\\n' '{self.marker}' \"$__cmdmanager_rc\"\n"
+                f"printf '\\n%s\\n' '{self.marker}' >&2\n")
+
+    def run(self, command, on_line=None):
+        """执行一条指令并等待其完成，返回退出码
+
+        on_line(stream, line) 接收该指令的输出行，output_bytes 为该指令各输出流的字节数。
+        指令使 shell 退出时返回 shell 的退出码，会话此前已结束时返回 -1。
+        """
+        self.on_line = on_line
+        self.return_code = None
+        self.output_bytes = {'stdout': 0, 'stderr': 0}
+        self.stdout_done.clear()
+        self.stderr_done.clear()
+        if self.closed:
+            return -1
+        try:
+            self.process.stdin.write(self._script(command))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            return -1
+        self.stdout_done.wait()
+        self.stderr_done.wait()
+        self.on_line = None
+        if self.return_code is None:
+            # 指令结束了 shell（例如 exit 0），返回 shell 的真实退出码
+            return self.process.wait()
+        return self.return_code
+
+    def close(self, grace=5):
+        """退出 shell，超时未退出时结束整个进程树"""
+        try:
+            self.process.stdin.write("exit\n")
+            self.process.stdin.close()
+            self.process.wait(grace)
+        except (BrokenPipeError, OSError, ValueError, subprocess.TimeoutExpired):
+            kill_tree(self.process, grace)
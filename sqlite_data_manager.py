@@ -0,0 +1,176 @@
+import json
+import sqlite3
+import threading
+from task_storage import TaskStorage, LazyTaskMap
+
+class SqliteDataManager(TaskStorage):
+    """基于 SQLite 的任务库，支持按名称查找、前缀/全文搜索和分页列表"""
+    indexed_search = True
+
+    def __init__(self, tasks_file="tasks.db", language_manager=None):
+        self.tasks_file = tasks_file
+        self.language_manager = language_manager
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(tasks_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.has_fts = True
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """创建表、索引及全文索引（SQLite 未编译 FTS5 时退化为 LIKE 搜索）"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "name TEXT PRIMARY KEY, position INTEGER NOT NULL, command TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_position ON tasks (position)")
+            # 名称前缀搜索与内存索引一致，不区分大小写
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_name_nocase ON tasks (name COLLATE NOCASE)")
+            try:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+                    "name, command, content='tasks', content_rowid='rowid', tokenize='trigram')"
+                )
+                self.conn.executescript("""
+                    CREATE TRIGGER IF NOT EXISTS tasks_ai AFTER INSERT ON tasks BEGIN
+                        INSERT INTO tasks_fts (rowid, name, command) VALUES (new.rowid, new.name, new.command);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS tasks_ad AFTER DELETE ON tasks BEGIN
+                        INSERT INTO tasks_fts (tasks_fts, rowid, name, command) VALUES ('delete', old.rowid, old.name, old.command);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS tasks_au AFTER UPDATE ON tasks BEGIN
+                        INSERT INTO tasks_fts (tasks_fts, rowid, name, command) VALUES ('delete', old.rowid, old.name, old.command);
+                        INSERT INTO tasks_fts (rowid, name, command) VALUES (new.rowid, new.name, new.command);
+                    END;
+                """)
+            except sqlite3.OperationalError:
+                self.has_fts = False
+
+    def _report(self, key, error):
+        if self.language_manager:
+            print(self.language_manager.get_text(key).format(str(error)))
+
+    def load_tasks(self):
+        """返回按需读取的任务映射，不在启动时加载整个任务库"""
+        return LazyTaskMap(self)
+
+    def save_tasks(self, tasks):
+        """用给定的任务列表整体替换任务库"""
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM tasks")
+                self.conn.executemany(
+                    "INSERT INTO tasks (name, position, command, data) VALUES (?, ?, ?, ?)",
+                    [(name, position, task.get("command", ""), json.dumps(task, ensure_ascii=False))
+                     for position, (name, task) in enumerate(tasks.items())]
+                )
+        except Exception as e:
+            self._report("messages.save_failed", e)
+
+    def put_task(self, name, task):
+        """新增或修改任务，修改时保留原有顺序"""
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "INSERT INTO tasks (name, position, command, data) "
+                    "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM tasks), ?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET command = excluded.command, data = excluded.data",
+                    (name, task.get("command", ""), json.dumps(task, ensure_ascii=False))
+                )
+        except Exception as e:
+            self._report("messages.save_failed", e)
+
+    def delete_task(self, name):
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM tasks WHERE name = ?", (name,))
+        except Exception as e:
+            self._report("messages.save_failed", e)
+
+    def get_task(self, name):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM tasks WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count_tasks(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def list_tasks(self, offset=0, limit=100):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT data FROM tasks ORDER BY position LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_task_names(self, page=1000):
+        """按任务库顺序逐页读取任务名，按 position 续读而不使用 OFFSET"""
+        position = -1
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT name, position FROM tasks WHERE position > ? ORDER BY position LIMIT ?", (position, page)
+                ).fetchall()
+            for name, _ in rows:
+                yield name
+            if len(rows) < page:
+                return
+            position = rows[-1][1]
+
+    def search_tasks(self, query, limit=100):
+        """名称完全匹配优先，其次为名称前缀匹配（均不区分大小写，同级按任务库顺序），最后为名称或指令中的全文匹配"""
+        if not query:
+            return self.list_tasks(0, limit)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT data FROM tasks WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE "
+                "ORDER BY name = ? COLLATE NOCASE DESC, position LIMIT ?",
+                (query, query + "\U0010ffff", query, limit)
+            ).fetchall()
+            results = [json.loads(row[0]) for row in rows]
+            seen = {task["name"] for task in results}
+            remaining = limit - len(results)
+            if remaining > 0:
+                if self.has_fts and len(query) >= 3:
+                    phrase = '"' + query.replace('"', '""') + '"'
+                    rows = self.conn.execute(
+                        "SELECT tasks.data FROM tasks_fts JOIN tasks ON tasks.rowid = tasks_fts.rowid "
+                        "WHERE tasks_fts MATCH ? ORDER BY rank LIMIT ?",
+                        (phrase, remaining + len(seen))
+                    ).fetchall()
+                else:
+                    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                    rows = self.conn.execute(
+                        "SELECT data FROM tasks WHERE name LIKE ? ESCAPE '\\' OR command LIKE ? ESCAPE '\\' "
+                        "ORDER BY position LIMIT ?",
+                        (pattern, pattern, remaining + len(seen))
+                    ).fetchall()
+                for row in rows:
+                    task = json.loads(row[0])
+                    if task["name"] not in seen and len(results) < limit:
+                        seen.add(task["name"])
+                        results.append(task)
+        return results
+
+    def export_tasks(self, file_path):
+        """导出任务列表到 JSON 文件"""
+        try:
+            tasks = {task["name"]: task for task in self.list_tasks(0, self.count_tasks())}
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(tasks, f, ensure_ascii=False, indent=4)
+            return True
+        except Exception as e:
+            self._report("messages.export_failed", e)
+            return False
+
+    def import_tasks(self, file_path):
+        """从 JSON 文件导入任务列表"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                tasks = json.load(f)
+            self.save_tasks(tasks)
+            return True
+        except Exception as e:
+            self._report("messages.import_failed", e)
+            return False
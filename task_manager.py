@@ -1,22 +1,208 @@
+import os
 import threading
 import time
 import subprocess
-from queue import Queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import platform
+from dag_scheduler import DagScheduler
+from search_index import TaskSearchIndex
+from output_reactor import OutputReactor, EventLoopOutputReactor
+from output_buffer import OutputBuffer, spill_path
+from process_control import group_kwargs, kill_tree
+from command_parser import parse_command, plan_step
+from shell_session import ShellSession
+from result_cache import ResultCache
+from metrics import MetricsRegistry, timing, counter
+from trace_export import BatchTrace
+
+class OutputLine(str):
+    """子进程输出的一行日志，附带来源流、原始内容和读取时间，可当作普通字符串使用"""
+    def __new__(cls, text, stream, line, timestamp):
+        obj = super().__new__(cls, text)
+        obj.stream = stream
+        obj.line = line
+        obj.time = timestamp
+        return obj
+
+class _OrderedLogRelay:
+    """按提交顺序输出批量任务日志：队首任务实时输出，其余任务缓冲到轮到它们时再输出"""
+    def __init__(self, count, log_callback):
+        self.log_callback = log_callback
+        self.buffers = [[] for _ in range(count)]
+        self.finished = [False] * count
+        self.head = 0
+        self.lock = threading.Lock()
+
+    def callback_for(self, index):
+        """获取指定任务的日志回调"""
+        def callback(message):
+            with self.lock:
+                if index == self.head:
+                    self.log_callback(message)
+                else:
+                    self.buffers[index].append(message)
+        return callback
+
+    def finish(self, index):
+        """标记任务完成，并输出后续已完成任务的缓冲日志"""
+        with self.lock:
+            self.finished[index] = True
+            while self.head < len(self.finished) and self.finished[self.head]:
+                self.head += 1
+                if self.head < len(self.buffers):
+                    for message in self.buffers[self.head]:
+                        self.log_callback(message)
+                    self.buffers[self.head] = []
+
+class _RunRecord:
+    """单次任务执行的统计信息，供执行历史使用"""
+    def __init__(self, task_name, output=None):
+        self.task_name = task_name
+        self.output = output
+        self.start_time = time.time()
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.steps = []
+        # 时间线导出使用：进入批次队列的时间、执行任务的线程以及聚合任务各步骤的区间
+        self.queued_at = None
+        self.thread = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.spans = []
+        self.lock = threading.Lock()
+        # 取消或超时时设置 stop_reason，并结束 processes 中正在运行的子进程
+        self.stop_event = threading.Event()
+        self.stop_reason = None
+        # 本次执行忽略结果缓存（--force）
+        self.force = False
+        self.processes = set()
+        # 输入未变化、直接使用缓存结果时为 True，执行历史中记录为 up_to_date
+        self.up_to_date = False
+
+    def add_process(self, process):
+        """登记子进程；执行已被停止时返回 False"""
+        with self.lock:
+            if self.stop_event.is_set():
+                return False
+            self.processes.add(process)
+            return True
+
+    def remove_process(self, process):
+        with self.lock:
+            self.processes.discard(process)
+
+    def stop(self, reason):
+        """标记执行已停止，返回需要结束的子进程"""
+        with self.lock:
+            if self.stop_reason is None:
+                self.stop_reason = reason
+            self.stop_event.set()
+            return list(self.processes)
+
+    def add_output(self, stream, size):
+        with self.lock:
+            if stream == 'stdout':
+                self.stdout_bytes += size
+            else:
+                self.stderr_bytes += size
+
+    def add_step(self, command, start_time, end_time, exit_code, kind="command"):
+        """记录一条子命令（kind 为 command）或暂停（kind 为 pause），以及执行它的线程"""
+        with self.lock:
+            self.steps.append({"command": command, "start_time": start_time, "end_time": end_time, "exit_code": exit_code,
+                               "kind": kind, "thread": threading.get_ident(), "thread_name": threading.current_thread().name})
+
+    def add_span(self, name, start_time, end_time, exit_code):
+        """记录聚合任务中一个步骤的执行区间"""
+        with self.lock:
+            self.spans.append({"name": name, "start_time": start_time, "end_time": end_time, "exit_code": exit_code,
+                               "thread": threading.get_ident(), "thread_name": threading.current_thread().name})
+
+    def to_dict(self, exit_code, status):
+        return {
+            "task_name": self.task_name,
+            "start_time": self.start_time,
+            "end_time": time.time(),
+            "exit_code": exit_code,
+            "status": status,
+            "stdout_bytes": self.stdout_bytes,
+            "stderr_bytes": self.stderr_bytes,
+            "output_file": self.output.spill_file if self.output else None,
+            "steps": sorted(self.steps, key=lambda step: step["start_time"]),
+            "queued_at": self.queued_at,
+            "thread": self.thread,
+            "thread_name": self.thread_name,
+            "spans": list(self.spans)
+        }
 
 class TaskManager:
-    def __init__(self, data_manager, language_manager):
+    def __init__(self, data_manager, language_manager, max_workers=None, log_manager=None, load_tasks=True,
+                 output_lines=1000, output_bytes=1024 * 1024, output_dir=None, output_keep=10, cache_file=None,
+                 metrics_file=None, trace_dir=None, trace_keep=20, output_tasks=200):
         self.data_manager = data_manager
         self.language_manager = language_manager
-        self.tasks = self.data_manager.load_tasks()
+        # 提供 record_run 的日志管理器，用于保存结构化执行历史
+        self.log_manager = log_manager
+        # load_tasks 为 False 时任务库延后由 reload_tasks 加载（例如界面显示之后）
+        self.tasks = self.data_manager.load_tasks() if load_tasks else {}
+        self.tasks_loaded = load_tasks
+        self.load_lock = threading.RLock()
         self.running_tasks = set()
-        self.task_queue = Queue()
         self.task_lock = threading.Lock()
-        self.pause_between_tasks = False
         self.platform = platform.system().lower()
+        # 并发执行的工作线程数，默认为CPU核数
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        # 搜索索引在第一次搜索时建立，之后随增删改增量更新
+        self.search_index = None
+        # 所有子进程的输出由一个反应器线程读取：POSIX 下使用 select，Windows 下使用 ProactorEventLoop（IOCP）
+        self.output_reactor = None
+        self.output_reactor_lock = threading.Lock()
+        # 每个任务最近一次执行的输出只在内存中保留有限行数/字节数，完整输出写入 output_dir
+        self.output_lines = output_lines
+        self.output_bytes = output_bytes
+        if output_dir is None and log_manager:
+            output_dir = os.path.join(os.path.dirname(os.path.abspath(log_manager.log_file)), "output")
+        self.output_dir = output_dir
+        self.output_keep = output_keep
+        # 最多保留 output_tasks 个任务的输出缓冲区，超出时丢弃最久未执行的（正在执行的任务除外）
+        self.output_tasks = output_tasks
+        self.task_outputs = OrderedDict()
+        self.task_outputs_lock = threading.Lock()
+        # 正在执行的任务 -> _RunRecord，用于取消和超时；结束进程时先等待 kill_grace 秒再强制结束
+        self.active_runs = {}
+        self.batch_stops = set()
+        # 已提交但尚未开始执行的任务 -> 排队次数；排队期间被取消的任务 -> 待跳过的次数，开始执行时跳过
+        self.queued_tasks = {}
+        self.cancelled_tasks = {}
+        self.kill_grace = 5
+        # 声明了 inputs/env 的任务按输入指纹缓存成功结果，输入未变化时跳过执行；缓存在第一次使用时打开
+        if cache_file is None and log_manager:
+            cache_file = os.path.join(os.path.dirname(os.path.abspath(log_manager.log_file)), "cache.db")
+        self.cache_file = cache_file
+        self.use_result_cache = True
+        self._result_cache = None
+        self._result_cache_lock = threading.Lock()
+        # 执行过程中的耗时和计数事件发送给 metrics_hooks，内置的 metrics 汇总为直方图，
+        # 并定期写入 Prometheus 文本文件 metrics_file（最短间隔 metrics_interval 秒）
+        self.metrics = MetricsRegistry()
+        self.metrics_hooks = [self.metrics]
+        if metrics_file is None and log_manager:
+            metrics_file = os.path.join(os.path.dirname(os.path.abspath(log_manager.log_file)), "metrics.prom")
+        self.metrics_file = metrics_file
+        self.metrics_interval = 5
+        self._metrics_written = 0
+        self._metrics_lock = threading.Lock()
+        # 包含多个任务的批量执行和聚合任务结束时把时间线写入 trace_dir（Chrome trace-event 格式），只保留最近 trace_keep 个
+        if trace_dir is None and log_manager:
+            trace_dir = os.path.join(os.path.dirname(os.path.abspath(log_manager.log_file)), "traces")
+        self.trace_dir = trace_dir
+        self.trace_keep = trace_keep
 
     def add_task(self, name, command):
         """添加新任务"""
+        self._ensure_loaded()
         if name in self.tasks:
             return False
         
@@ -25,19 +211,117 @@ class TaskManager:
             "command": command
         }
         self.tasks[name] = task
-        self.data_manager.save_tasks(self.tasks)
+        self.data_manager.put_task(name, task)
+        self._index_task(task)
+        return True
+
+    def add_aggregate(self, name, steps, session=False):
+        """添加聚合任务
+
+        steps 为 [{"task": 任务名, "depends_on": [任务名, ...]}, ...]，
+        执行时所有依赖已满足的步骤并发运行。command 字段保留串联后的指令，
+        用于预览以及兼容旧版本。session 为 True 时所有步骤按依赖顺序在
+        同一个 shell 会话中依次执行。
+        """
+        self._ensure_loaded()
+        if name in self.tasks:
+            return False
+
+        stored_steps = []
+        commands = []
+        for step in steps:
+            ref = self.tasks.get(step["task"])
+            if not ref:
+                continue
+            stored_steps.append({
+                "task": step["task"],
+                "command": ref["command"],
+                "depends_on": list(step.get("depends_on", []))
+            })
+            commands.append(ref["command"])
+        if not stored_steps:
+            return False
+
+        # 忽略指向不存在步骤的依赖，循环依赖时抛出 ValueError
+        names = [step["task"] for step in stored_steps]
+        for step in stored_steps:
+            step["depends_on"] = [dep for dep in step["depends_on"] if dep in names]
+        DagScheduler(names, {step["task"]: step["depends_on"] for step in stored_steps})
+
+        self.tasks[name] = {
+            "name": name,
+            "command": " && ".join(commands),
+            "steps": stored_steps
+        }
+        if session:
+            self.tasks[name]["session"] = True
+        self.data_manager.put_task(name, self.tasks[name])
+        self._index_task(self.tasks[name])
         return True
 
     def delete_task(self, name):
         """删除任务"""
         if name in self.tasks:
             del self.tasks[name]
-            self.data_manager.save_tasks(self.tasks)
+            self.data_manager.delete_task(name)
+            with self.task_outputs_lock:
+                if name not in self.running_tasks and name in self.task_outputs:
+                    self.task_outputs.pop(name).close()
+            if self.search_index is not None:
+                self.search_index.remove(name)
+
+    def reload_tasks(self):
+        """从存储重新加载任务（延后加载或导入任务后调用）"""
+        with self.load_lock:
+            self.tasks = self.data_manager.load_tasks()
+            self.search_index = None
+            self.tasks_loaded = True
+
+    def _ensure_loaded(self):
+        """延后加载的任务库尚未加载时先加载，避免新任务覆盖存储中的同名任务"""
+        if not self.tasks_loaded:
+            with self.load_lock:
+                if not self.tasks_loaded:
+                    self.reload_tasks()
+
+    def _index_task(self, task):
+        if self.search_index is not None:
+            self.search_index.add(task)
 
     def get_all_tasks(self):
         """获取所有任务"""
         return [task for task in self.tasks.values()]
 
+    def count_tasks(self):
+        """获取任务总数"""
+        return self.data_manager.count_tasks()
+
+    def list_tasks(self, offset=0, limit=100):
+        """按顺序分页获取任务"""
+        return self.data_manager.list_tasks(offset, limit)
+
+    def search_task_names(self, query, limit=None):
+        """搜索任务，返回按相关度排序的任务名
+
+        存储后端自带搜索索引（SQLite）时直接在后端搜索，不把任务库读入内存；
+        否则使用内存中的三元组索引。
+        """
+        if self.data_manager.indexed_search:
+            return [task["name"] for task in self._search_storage(query, limit)]
+        if self.search_index is None:
+            self.search_index = TaskSearchIndex()
+            self.search_index.rebuild(self.tasks.values())
+        return self.search_index.search(query, limit)
+
+    def search_tasks(self, query, limit=100):
+        """搜索任务，返回按相关度排序的任务"""
+        if self.data_manager.indexed_search:
+            return self._search_storage(query, limit)
+        return [self.tasks[name] for name in self.search_task_names(query, limit)]
+
+    def _search_storage(self, query, limit=None):
+        return self.data_manager.search_tasks(query.strip(), limit or self.data_manager.count_tasks())
+
     def get_task(self, name):
         """获取指定任务"""
         return self.tasks.get(name)
@@ -46,17 +330,18 @@ class TaskManager:
         """获取任务类型"""
         task = self.tasks.get(task_name)
         if task:
-            return "aggregate" if "&&" in task["command"] else "normal"
+            return "aggregate" if task.get("steps") or "&&" in task["command"] else "normal"
         return "normal"
 
     def update_task(self, name, task):
         """更新任务信息"""
         if name in self.tasks:
             self.tasks[name] = task
-            self.data_manager.save_tasks(self.tasks)
+            self.data_manager.put_task(name, task)
+            self._index_task(task)
 
-    def run_task(self, task_name, status_callback, log_callback):
-        """运行单个任务"""
+    def run_task(self, task_name, status_callback, log_callback, timeout=None):
+        """运行单个任务，timeout 为超时秒数（任务自身设置的 timeout 优先）"""
         if task_name in self.running_tasks:
             log_callback(self.language_manager.get_text("messages.task_running").format(task_name))
             return
@@ -66,54 +351,374 @@ class TaskManager:
             log_callback(self.language_manager.get_text("messages.task_not_exist").format(task_name))
             return
 
+        self._queue_tasks([task_name])
         thread = threading.Thread(
             target=self._execute_task,
-            args=(task, status_callback, log_callback)
+            args=(task, status_callback, log_callback, timeout)
         )
         thread.daemon = True
         thread.start()
 
-    def run_multiple_tasks(self, task_names, status_callback, log_callback, pause_between=False):
-        """运行多个任务"""
-        self.pause_between_tasks = pause_between
+    def get_task_output(self, task_name):
+        """获取任务最近一次执行保留在内存中的输出行"""
+        output = self.task_outputs.get(task_name)
+        return output.get_lines() if output else []
+
+    def get_task_output_file(self, task_name):
+        """获取任务最近一次执行的完整输出文件路径"""
+        output = self.task_outputs.get(task_name)
+        return output.spill_file if output else None
+
+    def _new_output(self, task_name):
+        """为一次执行创建输出缓冲区，替换该任务上一次的输出"""
+        spill_file = spill_path(self.output_dir, task_name, self.output_keep) if self.output_dir else None
+        output = OutputBuffer(self.output_lines, self.output_bytes, spill_file)
+        with self.task_outputs_lock:
+            self.task_outputs.pop(task_name, None)
+            self.task_outputs[task_name] = output
+            for name in list(self.task_outputs):
+                if len(self.task_outputs) <= self.output_tasks:
+                    break
+                if name not in self.running_tasks:
+                    self.task_outputs.pop(name).close()
+        return output
+
+    def cancel_task(self, task_name):
+        """取消正在执行或排队等待执行的任务，结束其全部子进程；任务未在执行也未排队时返回 False"""
+        with self.task_lock:
+            run_record = self.active_runs.get(task_name)
+            if run_record is None:
+                if not self.queued_tasks.get(task_name):
+                    return False
+                self.cancelled_tasks[task_name] = self.queued_tasks[task_name]
+                return True
+        self._stop_run(run_record, "cancelled")
+        return True
+
+    def _queue_tasks(self, task_names):
+        """登记已提交、尚未开始执行的任务"""
+        with self.task_lock:
+            for task_name in task_names:
+                self.queued_tasks[task_name] = self.queued_tasks.get(task_name, 0) + 1
+
+    def _dequeue_task(self, task_name):
+        """任务离开队列，返回它在排队期间是否被取消；调用方需持有 task_lock"""
+        count = self.queued_tasks.get(task_name, 0)
+        if not count:
+            return False
+        if count > 1:
+            self.queued_tasks[task_name] = count - 1
+        else:
+            del self.queued_tasks[task_name]
+        cancelled = self.cancelled_tasks.get(task_name, 0)
+        if not cancelled:
+            return False
+        if cancelled > 1:
+            self.cancelled_tasks[task_name] = cancelled - 1
+        else:
+            del self.cancelled_tasks[task_name]
+        return True
+
+    def cancel_all(self):
+        """取消所有正在执行的任务以及批量执行中尚未开始的任务"""
+        with self.task_lock:
+            runs = list(self.active_runs.values())
+            batch_stops = list(self.batch_stops)
+            self.cancelled_tasks.update(self.queued_tasks)
+        for stop_event in batch_stops:
+            stop_event.set()
+        for run_record in runs:
+            self._stop_run(run_record, "cancelled")
+
+    def _stop_run(self, run_record, reason):
+        """停止一次执行，在后台线程中结束其子进程树，不阻塞调用方"""
+        for process in run_record.stop(reason):
+            thread = threading.Thread(target=kill_tree, args=(process, self.kill_grace))
+            thread.daemon = True
+            thread.start()
+
+    @property
+    def result_cache(self):
+        with self._result_cache_lock:
+            if self._result_cache is None and self.cache_file:
+                self._result_cache = ResultCache(self.cache_file)
+            return self._result_cache
+
+    def _run_cached(self, task, log_callback, execute, run_record=None, force=False):
+        """执行 execute(log_callback)；任务声明了输入且输入未变化时报告已是最新并跳过执行
+
+        成功的结果连同输出保存到缓存中，失败的结果不缓存。跳过执行时重新输出缓存的
+        输出，并把 run_record 标记为已是最新。force 为 True 时总是执行，并更新缓存。
+        """
+        if not self.use_result_cache or not ResultCache.is_cacheable(task) or self.result_cache is None:
+            return execute(log_callback)
+        try:
+            fingerprint = self.result_cache.fingerprint(task)
+            cached = None if force else self.result_cache.get(fingerprint)
+            if cached:
+                self.emit_metric(counter("result_cache_hits_total"))
+                log_callback(self.language_manager.get_text("messages.task_up_to_date").format(task["name"]))
+                for line in cached["output"]:
+                    log_callback(line)
+                if run_record:
+                    run_record.up_to_date = True
+                return cached["exit_code"]
+        except Exception as e:
+            # 缓存不可用时照常执行
+            log_callback(self.language_manager.get_text("messages.error").format(str(e)))
+            return execute(log_callback)
+
+        output = OutputBuffer(self.output_lines, self.output_bytes)
+
+        def capture(message):
+            output.append(message)
+            log_callback(message)
+
+        return_code = execute(capture)
+        if return_code == 0:
+            try:
+                self.result_cache.put(fingerprint, task["name"], return_code, output.get_lines())
+            except Exception as e:
+                log_callback(self.language_manager.get_text("messages.error").format(str(e)))
+        return return_code
+
+    def add_metrics_hook(self, hook):
+        """注册指标钩子，hook.record(event) 接收每个耗时/计数事件"""
+        self.metrics_hooks = self.metrics_hooks + [hook]
+
+    def remove_metrics_hook(self, hook):
+        self.metrics_hooks = [h for h in self.metrics_hooks if h is not hook]
+
+    def emit_metric(self, event):
+        """把指标事件发送给所有钩子，钩子出错不影响任务执行"""
+        for hook in self.metrics_hooks:
+            try:
+                hook.record(event)
+            except Exception:
+                pass
+
+    def write_metrics(self, force=True):
+        """把汇总的指标写入 metrics_file；force 为 False 时距上次写入不足 metrics_interval 秒则跳过"""
+        if not self.metrics_file:
+            return
+        with self._metrics_lock:
+            now = time.monotonic()
+            if not force and now - self._metrics_written < self.metrics_interval:
+                return
+            self._metrics_written = now
+            try:
+                self.metrics.write_prometheus(self.metrics_file)
+            except Exception as e:
+                print(self.language_manager.get_text("messages.write_metrics_failed").format(str(e)))
+
+    def _write_trace(self, trace, log_callback):
+        """写出时间线文件并在日志中给出路径"""
+        try:
+            path = spill_path(self.trace_dir, trace.name, self.trace_keep, ".json")
+            trace.write(path)
+            log_callback(self.language_manager.get_text("messages.trace_saved").format(path))
+        except Exception as e:
+            log_callback(self.language_manager.get_text("messages.error").format(str(e)))
+
+    def set_max_workers(self, max_workers):
+        """设置并发工作线程数，正在执行的任务不受影响
+
+        旧线程池不再接受新任务，已提交的任务在其中执行完毕后自行退出；
+        正在进行的批次之后提交的任务进入新线程池。
+        """
+        with self.executor_lock:
+            self.max_workers = max(1, int(max_workers))
+            old_executor, self.executor = self.executor, None
+        if old_executor:
+            old_executor.shutdown(wait=False)
+
+    def _submit(self, fn, *args):
+        """把任务提交到当前的共享线程池（必要时创建）
+
+        在 executor_lock 内提交，避免 set_max_workers 同时关闭该线程池导致提交失败。
+        """
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="task-worker")
+            return self.executor.submit(fn, *args)
+
+    def shutdown(self, wait=False):
+        """关闭线程池"""
+        with self.executor_lock:
+            executor, self.executor = self.executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+        self.write_metrics()
+
+    def run_multiple_tasks(self, task_names, status_callback, log_callback, pause_between=False, max_parallel=None, ordered=False,
+                           timeout=None, batch_timeout=None):
+        """运行多个任务
+
+        max_parallel 限制本批次的最大并发数（不超过线程池大小），
+        ordered 为 True 时按提交顺序输出各任务日志，否则按完成顺序实时输出。
+        勾选任务间暂停时，本批次按顺序逐个执行。
+        timeout 为单个任务的超时秒数，batch_timeout 为整个批次的超时秒数，
+        批次超时后正在执行的任务被终止，尚未开始的任务被跳过。
+        """
+        thread = threading.Thread(
+            target=self.run_tasks_and_wait,
+            args=(task_names, status_callback, log_callback, pause_between, max_parallel, ordered, timeout, batch_timeout)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def run_tasks_and_wait(self, task_names, status_callback, log_callback, pause_between=False, max_parallel=None, ordered=False,
+                           timeout=None, batch_timeout=None, force=False):
+        """与 run_multiple_tasks 相同，但在当前线程中等待批次结束，返回 {任务名: 退出码}
+
+        不存在、已在执行中或因批次超时被跳过的任务退出码为 None。force 为 True 时
+        本批次的任务忽略结果缓存，即使输入未变化也会执行。
+        """
+        batch = []
         for task_name in task_names:
             if task_name not in self.tasks:
                 log_callback(self.language_manager.get_text("messages.task_not_exist").format(task_name))
                 continue
+            batch.append(task_name)
 
-            self.task_queue.put(task_name)
+        if not batch:
+            return {task_name: None for task_name in task_names}
 
-        if not self.task_queue.empty():
-            thread = threading.Thread(
-                target=self._process_task_queue,
-                args=(status_callback, log_callback)
-            )
-            thread.daemon = True
-            thread.start()
+        if pause_between:
+            max_parallel = 1
+        max_parallel = max(1, min(max_parallel or self.max_workers, self.max_workers))
+
+        results = self._process_batch(batch, status_callback, log_callback, pause_between, max_parallel, ordered, timeout, batch_timeout,
+                                      force)
+        return {task_name: results.get(task_name) for task_name in task_names}
 
-    def _process_task_queue(self, status_callback, log_callback):
-        """处理任务队列"""
-        while not self.task_queue.empty():
-            task_name = self.task_queue.get()
-            task = self.tasks.get(task_name)
-            if task:
-                self._execute_task(task, status_callback, log_callback)
-                if self.pause_between_tasks and not self.task_queue.empty():
+    def _process_batch(self, batch, status_callback, log_callback, pause_between, max_parallel, ordered, timeout=None, batch_timeout=None,
+                       force=False):
+        """按批次并发度将任务分发到线程池，返回 {任务名: 退出码}"""
+        slots = threading.Semaphore(max_parallel)
+        relay = _OrderedLogRelay(len(batch), log_callback) if ordered else None
+        futures = []
+        queued_at = time.monotonic()
+        # 单个普通任务的时间线没有可分析的内容，只为多个任务的批次记录时间线（聚合任务自行记录）
+        trace = BatchTrace("batch") if self.trace_dir and len(batch) > 1 else None
+        batch_deadline = time.monotonic() + batch_timeout if batch_timeout else None
+        stop_event = threading.Event()
+        with self.task_lock:
+            self.batch_stops.add(stop_event)
+        self._queue_tasks(batch)
+        position = 0
+        if batch_deadline:
+            # 批次超时后不再启动新任务，已开始的任务由各自的截止时间终止
+            timer = threading.Timer(batch_timeout, stop_event.set)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            for index, task_name in enumerate(batch):
+                slots.acquire()
+                position = index + 1
+                task = self.tasks.get(task_name)
+                if not task or stop_event.is_set():
+                    slots.release()
+                    with self.task_lock:
+                        self._dequeue_task(task_name)
+                    if task and batch_deadline and time.monotonic() >= batch_deadline:
+                        log_callback(self.language_manager.get_text("messages.batch_timeout").format(task_name))
+                    if relay:
+                        relay.finish(index)
+                    continue
+
+                task_log = relay.callback_for(index) if relay else log_callback
+                future = self._submit(self._execute_task, task, status_callback, task_log, timeout, batch_deadline, queued_at, trace,
+                                      force)
+
+                def on_done(_future, index=index):
+                    if relay:
+                        relay.finish(index)
+                    slots.release()
+                future.add_done_callback(on_done)
+                futures.append((task_name, future))
+
+                if pause_between and index < len(batch) - 1:
+                    # 串行模式下等待当前任务结束后再暂停
+                    future.result()
                     log_callback(self.language_manager.get_text("messages.pause_3s"))
-                    time.sleep(3)
-            self.task_queue.task_done()
+                    pause_start = time.time()
+                    stop_event.wait(3)
+                    if trace:
+                        trace.add_span("pause 3", pause_start, time.time(), "pause")
 
-    def _execute_task(self, task, status_callback, log_callback):
-        """执行任务"""
+            results = {task_name: future.result() for task_name, future in futures}
+        finally:
+            with self.task_lock:
+                self.batch_stops.discard(stop_event)
+                for task_name in batch[position:]:
+                    self._dequeue_task(task_name)
+            if batch_deadline:
+                timer.cancel()
+        self.write_metrics()
+        if trace:
+            trace.add_span("batch", trace.start_time, time.time(), args={"tasks": len(batch), "max_parallel": max_parallel})
+            self._write_trace(trace, log_callback)
+        return results
+
+    def _execute_task(self, task, status_callback, log_callback, timeout=None, deadline=None, queued_at=None, trace=None,
+                      force=False):
+        """执行任务，返回退出码；任务已在执行中时返回 None
+
+        timeout 为超时秒数（任务自身设置的 timeout 优先），deadline 为
+        time.monotonic() 形式的最晚结束时间，超时后结束任务的全部子进程。
+        queued_at 为任务进入批次队列的 time.monotonic() 时间，用于统计排队耗时。
+        trace 为所属批次的时间线；不属于多任务批次的聚合任务单独写出时间线。
+        force 为 True 时任务及其步骤忽略结果缓存。
+        """
         task_name = task["name"]
         command = task["command"]
+        return_code = -1
+        started = time.monotonic()
+        report_status = status_callback
+
+        def status_callback(name, status):
+            start = time.perf_counter()
+            report_status(name, status)
+            self.emit_metric(timing("status_callback_seconds", time.perf_counter() - start))
 
         with self.task_lock:
-            if task_name in self.running_tasks:
-                return
-            self.running_tasks.add(task_name)
-            # 添加初始状态回调
-            status_callback(task_name, "task_status.waiting")
+            cancelled = self._dequeue_task(task_name)
+            if not cancelled:
+                if task_name in self.running_tasks:
+                    return None
+                # 在同一临界区中登记执行记录，之后到达的取消请求都能找到它
+                run_record = _RunRecord(task_name)
+                run_record.force = force
+                self.running_tasks.add(task_name)
+                self.active_runs[task_name] = run_record
+                # 添加初始状态回调
+                status_callback(task_name, "task_status.waiting")
+        if cancelled:
+            status_callback(task_name, "task_status.cancelled")
+            log_callback(self.language_manager.get_text("messages.task_cancelled").format(task_name))
+            return -1
+
+        output = self._new_output(task_name)
+        run_record.output = output
+        if queued_at is not None:
+            self.emit_metric(timing("task_queue_wait_seconds", started - queued_at))
+            run_record.queued_at = run_record.start_time - (started - queued_at)
+
+        timeout = task.get("timeout") or timeout
+        if timeout:
+            deadline = min(deadline, time.monotonic() + timeout) if deadline else time.monotonic() + timeout
+        timer = None
+        if deadline:
+            timer = threading.Timer(max(0, deadline - time.monotonic()), self._stop_run, (run_record, "timeout"))
+            timer.daemon = True
+            timer.start()
+        task_log = log_callback
+
+        def log_callback(message):
+            output.append(message)
+            task_log(message)
 
         try:
             # 更新为执行中状态
@@ -121,23 +726,24 @@ class TaskManager:
             log_callback(self.language_manager.get_text("messages.start_task").format(task_name))
             log_callback(self.language_manager.get_text("messages.execute_command").format(command))
             
-            return_code = 0
-            # 如果是聚合命令，分割并逐个执行
-            if "&&" in command:
-                commands = [cmd.strip() for cmd in command.split("&&")]
-                for cmd in commands:
-                    if not cmd:
-                        continue
-                    log_callback(f"执行子命令: {cmd}")
-                    cmd_return_code = self._execute_single_command(cmd, log_callback)
-                    if cmd_return_code != 0:
-                        return_code = cmd_return_code
-                        break
+            if task.get("session"):
+                execute = lambda log: self._execute_session(task, log, run_record)
+            elif task.get("steps"):
+                execute = lambda log: self._execute_graph(task, log, (task_name,), run_record)
             else:
-                return_code = self._execute_single_command(command, log_callback)
+                execute = lambda log: self._execute_command_chain(command, log, run_record)
+            return_code = self._run_cached(task, log_callback, execute, run_record, force)
 
             # 根据返回码更新最终状态
-            if return_code == 0:
+            if run_record.stop_reason == "timeout":
+                status_callback(task_name, "task_status.timeout")
+                log_callback(self.language_manager.get_text("messages.task_timeout").format(task_name))
+            elif run_record.stop_reason == "cancelled":
+                status_callback(task_name, "task_status.cancelled")
+                log_callback(self.language_manager.get_text("messages.task_cancelled").format(task_name))
+            elif run_record.up_to_date:
+                status_callback(task_name, "task_status.up_to_date")
+            elif return_code == 0:
                 status_callback(task_name, "task_status.completed")
                 log_callback(self.language_manager.get_text("messages.task_success").format(task_name))
             else:
@@ -147,67 +753,280 @@ class TaskManager:
         except Exception as e:
             status_callback(task_name, "task_status.failed")
             log_callback(self.language_manager.get_text("messages.task_error").format(task_name, str(e)))
+            return_code = -1
 
         finally:
+            if timer:
+                timer.cancel()
             with self.task_lock:
                 self.running_tasks.remove(task_name)
+                self.active_runs.pop(task_name, None)
+            output.close()
 
-    def _execute_single_command(self, command, log_callback):
+        if run_record.stop_reason:
+            status = run_record.stop_reason
+        elif run_record.up_to_date:
+            status = "up_to_date"
+        else:
+            status = "completed" if return_code == 0 else "failed"
+        self.emit_metric(timing("task_duration_seconds", time.monotonic() - started, {"status": status}, task=task_name))
+        self.emit_metric(counter("tasks_total", 1, {"status": status}))
+        self.emit_metric(counter("output_bytes_total", run_record.stdout_bytes, {"stream": "stdout"}))
+        self.emit_metric(counter("output_bytes_total", run_record.stderr_bytes, {"stream": "stderr"}))
+        self.write_metrics(force=False)
+        record = run_record.to_dict(return_code, status)
+        if trace:
+            trace.add_run(record)
+        elif task.get("steps") and self.trace_dir:
+            trace = BatchTrace(task_name)
+            trace.start_time = record["start_time"]
+            trace.add_run(record)
+            self._write_trace(trace, task_log)
+        if self.log_manager:
+            self.log_manager.record_run(record)
+        return return_code
+
+    def _execute_command_chain(self, command, log_callback, run_record=None):
+        """按解析后的执行计划执行指令，&&、|| 和顺序分隔符的语义与 shell 相同
+
+        pause 之间的片段合并由一个 shell 进程执行，解析结果按指令文本缓存。
+        """
+        plan = parse_command(command, self.platform == "windows")
+        return_code = 0
+        index = 0
+        while index < len(plan):
+            step, index = plan_step(plan, index, return_code)
+            if step is None:
+                continue
+            if run_record and run_record.stop_event.is_set():
+                return -1
+            kind, value = step
+            if kind == "pause":
+                return_code = self._pause(value, log_callback, run_record)
+                continue
+            if len(plan) > 1:
+                log_callback(f"执行子命令: {value}")
+            return_code = self._execute_single_command(value, log_callback, run_record)
+        return return_code
+
+    def _pause(self, seconds, log_callback, run_record=None):
+        """内置的 pause N 指令，暂停期间取消或超时立即结束"""
+        log_callback(f"pause {seconds} seconds...")
+        start_time = time.time()
+        if run_record:
+            return_code = -1 if run_record.stop_event.wait(seconds) else 0
+            run_record.add_step(f"pause {seconds}", start_time, time.time(), return_code, "pause")
+            return return_code
+        time.sleep(seconds)
+        return 0
+
+    def _execute_graph(self, task, log_callback, stack, run_record=None):
+        """按依赖图执行聚合任务，返回第一个失败步骤的退出码"""
+        steps = {step["task"]: step for step in task["steps"]}
+        scheduler = DagScheduler(
+            [step["task"] for step in task["steps"]],
+            {step["task"]: step.get("depends_on", []) for step in task["steps"]},
+            self.max_workers
+        )
+
+        def run_step(step_name):
+            start_time = time.time()
+            return_code = execute_step(step_name)
+            if run_record:
+                run_record.add_span(step_name, start_time, time.time(), return_code)
+            return return_code
+
+        def execute_step(step_name):
+            step = steps[step_name]
+            ref = self.tasks.get(step_name)
+            if run_record and run_record.stop_event.is_set():
+                return -1
+            log_callback(self.language_manager.get_text("messages.start_step").format(step_name))
+            if ref and ref.get("steps"):
+                if step_name in stack:
+                    log_callback(self.language_manager.get_text("messages.step_cycle").format(step_name))
+                    return -1
+                return self._execute_graph(ref, log_callback, stack + (step_name,), run_record)
+            # 引用的任务已被删除时，使用创建聚合时保存的指令
+            if not ref:
+                return self._execute_command_chain(step["command"], log_callback, run_record)
+            return self._run_cached(ref, log_callback, lambda log: self._execute_command_chain(ref["command"], log, run_record),
+                                    force=bool(run_record and run_record.force))
+
+        start = time.monotonic()
+        results = scheduler.run(run_step)
+        elapsed = time.monotonic() - start
+
+        return_code = 0
+        for step_name in scheduler.nodes:
+            result = results.get(step_name, {"status": "skipped"})
+            if result["status"] == "skipped":
+                log_callback(self.language_manager.get_text("messages.step_skipped").format(step_name))
+            elif result["status"] == "failed" and return_code == 0:
+                return_code = result["return_code"]
+
+        path, path_time = scheduler.critical_path(results)
+        if path:
+            log_callback(self.language_manager.get_text("messages.critical_path").format(" -> ".join(path), path_time, elapsed))
+        return return_code
+
+    def _session_steps(self, task, log_callback, stack):
+        """把聚合任务按依赖顺序展开为 [(步骤名, 指令), ...]，嵌套的聚合任务递归展开"""
+        if not task.get("steps"):
+            return [(task["name"], task["command"])]
+        steps = {step["task"]: step for step in task["steps"]}
+        scheduler = DagScheduler(
+            [step["task"] for step in task["steps"]],
+            {step["task"]: step.get("depends_on", []) for step in task["steps"]}
+        )
+        ordered = []
+        for step_name in scheduler.topological_order():
+            ref = self.tasks.get(step_name)
+            if ref and ref.get("steps"):
+                if step_name in stack:
+                    log_callback(self.language_manager.get_text("messages.step_cycle").format(step_name))
+                    continue
+                ordered.extend(self._session_steps(ref, log_callback, stack + (step_name,)))
+            else:
+                ordered.append((step_name, ref["command"] if ref else steps[step_name]["command"]))
+        return ordered
+
+    def _execute_session(self, task, log_callback, run_record=None):
+        """在一个常驻 shell 会话中依次执行聚合任务的各步骤，遇到失败立即停止
+
+        步骤之间保留工作目录和环境变量，每个步骤不再单独启动 shell 进程。
+        """
+        steps = self._session_steps(task, log_callback, (task["name"],))
+        session = ShellSession(self.platform == "windows")
+        if not self._track_process(run_record, session.process):
+            return -1
+        try:
+            for index, (step_name, command) in enumerate(steps):
+                if run_record and run_record.stop_event.is_set():
+                    return -1
+                log_callback(self.language_manager.get_text("messages.start_step").format(step_name))
+                # 会话中的步骤可能改变工作目录或环境变量，不按输入缓存跳过
+                start_time = time.time()
+                return_code = self._run_session_command(session, command, log_callback, run_record)
+                if run_record:
+                    run_record.add_span(step_name, start_time, time.time(), return_code)
+                if return_code != 0:
+                    for skipped, _ in steps[index + 1:]:
+                        log_callback(self.language_manager.get_text("messages.step_skipped").format(skipped))
+                    return return_code
+            return 0
+        finally:
+            session.close(self.kill_grace)
+            if run_record:
+                run_record.remove_process(session.process)
+
+    def _run_session_command(self, session, command, log_callback, run_record=None):
+        """在会话中按执行计划执行一个步骤的指令"""
+        error_format = self.language_manager.get_formatter("messages.error")
+
+        def handle_line(stream, line):
+            line = line.strip()
+            if line:
+                text = line if stream == 'stdout' else error_format(line)
+                log_callback(OutputLine(text, stream, line, time.time()))
+
+        plan = parse_command(command, self.platform == "windows")
+        return_code = 0
+        index = 0
+        while index < len(plan):
+            step, index = plan_step(plan, index, return_code)
+            if step is None:
+                continue
+            kind, value = step
+            if kind == "pause":
+                return_code = self._pause(value, log_callback, run_record)
+                continue
+            if session.closed:
+                # 之前的指令已结束 shell（例如 exit 0），后续指令无法在会话中执行
+                log_callback(self.language_manager.get_text("messages.session_ended").format(value))
+                return -1
+            start_time = time.time()
+            return_code = session.run(value, handle_line)
+            self.emit_metric(timing("command_duration_seconds", time.time() - start_time, {"mode": "session"}))
+            if run_record:
+                for stream, size in session.output_bytes.items():
+                    run_record.add_output(stream, size)
+                run_record.add_step(value, start_time, time.time(), return_code)
+        return return_code
+
+    def _execute_single_command(self, command, log_callback, run_record=None):
+        """执行单个命令，并记录到执行统计中"""
+        start_time = time.time()
+        return_code = self._run_single_command(command, log_callback, run_record)
+        self.emit_metric(timing("command_duration_seconds", time.time() - start_time, {"mode": "process"}))
+        if run_record:
+            run_record.add_step(command, start_time, time.time(), return_code)
+        return return_code
+
+    def _run_single_command(self, command, log_callback, run_record):
         """执行单个命令"""
         try:
-            # 特殊处理pause命令
-            if command.strip().lower().startswith('pause'):
-                try:
-                    # 提取暂停时间（秒数）
-                    pause_time = int(command.strip().split()[1])
-                    log_callback(f"pause {pause_time} seconds...")
-                    time.sleep(pause_time)
-                    return 0
-                except (IndexError, ValueError):
-                    # 如果没有指定时间或格式错误，默认暂停3秒
-                    log_callback("暂停3秒...")
-                    time.sleep(3)
-                    return 0
-
-            # 其他命令使用原有的处理逻辑
-            shell = True if self.platform == "windows" else False
+            # 通过平台的 shell（cmd.exe 或 /bin/sh）执行，指令中的参数、引号和连接符由 shell 处理
+            shell = True
+            error_format = self.language_manager.get_formatter("messages.error")
+
+            def handle_line(stream, line, timestamp=None):
+                line = line.strip()
+                if line:
+                    text = line if stream == 'stdout' else error_format(line)
+                    log_callback(OutputLine(text, stream, line, timestamp or time.time()))
+
+            def count_bytes(stream, size):
+                if run_record:
+                    run_record.add_output(stream, size)
+
+            spawn_start = time.perf_counter()
+            if self.platform == "windows":
+                # Windows 管道不支持 select，由事件循环反应器启动进程并通过 IOCP 读取其输出
+                process, watch = self._get_output_reactor().spawn(command, handle_line, count_bytes, **group_kwargs())
+                self.emit_metric(timing("process_spawn_seconds", time.perf_counter() - spawn_start))
+                if not self._track_process(run_record, process):
+                    watch.wait()
+                    return -1
+                watch.wait()
+                if run_record:
+                    run_record.remove_process(process)
+                return watch.returncode
+
             process = subprocess.Popen(
                 command,
                 shell=shell,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8'
+                **group_kwargs()
             )
-
-            # 创建输出读取线程
-            def read_output(pipe, callback_type):
-                try:
-                    for line in iter(pipe.readline, ''):
-                        if line:
-                            line = line.strip()
-                            if line:
-                                if callback_type == 'stdout':
-                                    log_callback(line)
-                                else:
-                                    log_callback(self.language_manager.get_text("messages.error").format(line))
-                except Exception as e:
-                    log_callback(self.language_manager.get_text("messages.error").format(str(e)))
-
-            stdout_thread = threading.Thread(target=read_output, args=(process.stdout, 'stdout'))
-            stderr_thread = threading.Thread(target=read_output, args=(process.stderr, 'stderr'))
-            stdout_thread.daemon = True
-            stderr_thread.daemon = True
-            stdout_thread.start()
-            stderr_thread.start()
+            self.emit_metric(timing("process_spawn_seconds", time.perf_counter() - spawn_start))
+            watch = self._get_output_reactor().watch(process, handle_line, count_bytes)
+            if not self._track_process(run_record, process):
+                watch.wait()
+                return -1
 
             # 等待进程完成
             process.wait()
-            stdout_thread.join()
-            stderr_thread.join()
+            watch.wait()
+            if run_record:
+                run_record.remove_process(process)
 
             return process.returncode
 
         except Exception as e:
             log_callback(self.language_manager.get_text("messages.error").format(str(e)))
-            return -1
\ No newline at end of file
+            return -1
+
+    def _track_process(self, run_record, process):
+        """登记子进程以便取消；执行已被停止时立即结束该进程并返回 False"""
+        if run_record is None or run_record.add_process(process):
+            return True
+        kill_tree(process, self.kill_grace)
+        return False
+
+    def _get_output_reactor(self):
+        with self.output_reactor_lock:
+            if self.output_reactor is None:
+                self.output_reactor = EventLoopOutputReactor() if self.platform == "windows" else OutputReactor()
+            return self.output_reactor
@@ -0,0 +1,105 @@
+import os
+from collections.abc import MutableMapping
+
+class TaskStorage:
+    """任务库存储接口
+
+    load_tasks 返回 {任务名: 任务} 映射，增删改通过 put_task/delete_task
+    按单个任务写入。查询接口的默认实现基于 load_tasks，后端可按需重写。
+    indexed_search 为 True 的后端自带搜索索引，TaskManager 直接使用其 search_tasks。
+    """
+    indexed_search = False
+
+    def load_tasks(self):
+        raise NotImplementedError
+
+    def save_tasks(self, tasks):
+        raise NotImplementedError
+
+    def put_task(self, name, task):
+        raise NotImplementedError
+
+    def delete_task(self, name):
+        raise NotImplementedError
+
+    def flush(self):
+        """写出尚未落盘的修改"""
+
+    def get_task(self, name):
+        """按名称获取单个任务"""
+        return self.load_tasks().get(name)
+
+    def count_tasks(self):
+        """获取任务总数"""
+        return len(self.load_tasks())
+
+    def list_tasks(self, offset=0, limit=100):
+        """按任务库顺序分页获取任务"""
+        return list(self.load_tasks().values())[offset:offset + limit]
+
+    def iter_task_names(self):
+        """按任务库顺序逐个产出任务名"""
+        return iter(list(self.load_tasks()))
+
+    def search_tasks(self, query, limit=100):
+        """按名称前缀或名称/指令中包含的文本搜索任务"""
+        return match_tasks(self.load_tasks().values(), query, limit)
+
+def match_tasks(tasks, query, limit=100):
+    """在任务序列中搜索，名称前缀匹配的排在前面"""
+    query = query.lower()
+    prefix, contains = [], []
+    for task in tasks:
+        name = task["name"].lower()
+        if name.startswith(query):
+            prefix.append(task)
+        elif query in name or query in task.get("command", "").lower():
+            contains.append(task)
+    return (prefix + contains)[:limit]
+
+class LazyTaskMap(MutableMapping):
+    """按需从存储读取任务的映射，避免启动时物化整个任务库
+
+    只缓存访问过的任务；遍历只读取任务名，不解析和缓存任务内容。
+    写入只更新缓存，持久化仍由 put_task/delete_task 完成。
+    """
+    def __init__(self, storage):
+        self.storage = storage
+        self.cache = {}
+        self.deleted = set()
+
+    def __getitem__(self, name):
+        if name in self.deleted:
+            raise KeyError(name)
+        task = self.cache.get(name)
+        if task is None:
+            task = self.storage.get_task(name)
+            if task is None:
+                raise KeyError(name)
+            self.cache[name] = task
+        return task
+
+    def __setitem__(self, name, task):
+        self.deleted.discard(name)
+        self.cache[name] = task
+
+    def __delitem__(self, name):
+        self[name]
+        self.cache.pop(name, None)
+        self.deleted.add(name)
+
+    def __iter__(self):
+        for name in self.storage.iter_task_names():
+            if name not in self.deleted:
+                yield name
+
+    def __len__(self):
+        return self.storage.count_tasks()
+
+def open_data_manager(tasks_file="tasks.json", language_manager=None):
+    """根据文件扩展名选择任务库存储后端：.db/.sqlite 使用 SQLite，其余使用 JSON"""
+    if os.path.splitext(tasks_file)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        from sqlite_data_manager import SqliteDataManager
+        return SqliteDataManager(tasks_file, language_manager)
+    from data_manager import DataManager
+    return DataManager(tasks_file, language_manager)
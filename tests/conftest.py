@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language_manager import LanguageManager
+from data_manager import DataManager
+from task_manager import TaskManager
+
+@pytest.fixture
+def language_manager():
+    return LanguageManager()
+
+@pytest.fixture
+def task_manager(tmp_path, language_manager):
+    """使用临时任务库的任务管理器，不写日志、时间线和指标文件"""
+    tm = TaskManager(DataManager(str(tmp_path / "tasks.json"), language_manager), language_manager)
+    yield tm
+    tm.shutdown()
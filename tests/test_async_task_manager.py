@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+from async_task_manager import AsyncTaskManager
+
+def collect(events):
+    return lambda event: events.append(event)
+
+def test_run_task_emits_output_events(task_manager):
+    task_manager.add_task("hello", "echo out; echo err 1>&2")
+    events = []
+    return_code = asyncio.run(AsyncTaskManager(task_manager).run_task("hello", collect(events)))
+    assert return_code == 0
+    output = {(event["stream"], event["line"]) for event in events if event["type"] == "output"}
+    assert output == {("stdout", "out"), ("stderr", "err")}
+    assert events[-1] == {"type": "exit", "task": "hello", "return_code": 0}
+    assert "task_status.completed" in [event["status"] for event in events if event["type"] == "status"]
+
+def test_session_aggregate_keeps_working_directory(task_manager, tmp_path):
+    task_manager.add_task("cd", f"cd {tmp_path}")
+    task_manager.add_task("pwd", "pwd")
+    task_manager.add_aggregate("both", [{"task": "cd"}, {"task": "pwd", "depends_on": ["cd"]}], session=True)
+    events = []
+    return_code = asyncio.run(AsyncTaskManager(task_manager).run_task("both", collect(events)))
+    assert return_code == 0
+    assert str(tmp_path) in [event["line"] for event in events if event["type"] == "output"]
+
+def test_result_cache_skips_unchanged_inputs(task_manager, tmp_path, language_manager):
+    source = tmp_path / "input.txt"
+    source.write_text("a")
+    task_manager.cache_file = str(tmp_path / "cache.db")
+    task_manager.add_task("build", "echo built")
+    task_manager.update_task("build", dict(task_manager.get_task("build"), inputs=[str(source)]))
+    runner = AsyncTaskManager(task_manager)
+    up_to_date = language_manager.get_text("messages.task_up_to_date").format("build")
+
+    def run():
+        events = []
+        assert asyncio.run(runner.run_task("build", collect(events))) == 0
+        return events
+
+    first = run()
+    assert "built" in [event["line"] for event in first if event["type"] == "output"]
+    second = run()
+    assert up_to_date in [event["message"] for event in second if event["type"] == "log"]
+    source.write_text("b")
+    third = run()
+    assert up_to_date not in [event.get("message") for event in third]
+
+def test_cancel_task_stops_async_run(task_manager):
+    task_manager.add_task("slow", "sleep 30")
+    runner = AsyncTaskManager(task_manager)
+
+    async def main():
+        events = []
+        job = asyncio.ensure_future(runner.run_task("slow", collect(events)))
+        while "slow" not in task_manager.active_runs:
+            await asyncio.sleep(0.01)
+        assert task_manager.cancel_task("slow")
+        return await asyncio.wait_for(job, 10), events
+
+    start = time.monotonic()
+    return_code, events = asyncio.run(main())
+    assert time.monotonic() - start < 10
+    assert return_code != 0
+    assert "task_status.cancelled" in [event["status"] for event in events if event["type"] == "status"]
+    assert "slow" not in task_manager.running_tasks
+
+def test_cancelling_coroutine_stops_task(task_manager):
+    task_manager.add_task("slow", "sleep 30")
+    runner = AsyncTaskManager(task_manager)
+
+    async def main():
+        job = asyncio.ensure_future(runner.run_task("slow"))
+        while not task_manager.active_runs.get("slow") or not task_manager.active_runs["slow"].processes:
+            await asyncio.sleep(0.01)
+        job.cancel()
+        try:
+            await job
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    start = time.monotonic()
+    assert asyncio.run(main())
+    assert time.monotonic() - start < 10
+    assert not task_manager.running_tasks
+
+def test_async_runs_write_trace_and_metrics(task_manager, tmp_path):
+    task_manager.trace_dir = str(tmp_path / "traces")
+    task_manager.add_task("a", "echo a")
+    task_manager.add_task("b", "echo b")
+    task_manager.add_aggregate("ab", [{"task": "a"}, {"task": "b"}])
+    assert asyncio.run(AsyncTaskManager(task_manager).run_task("ab")) == 0
+    assert list((tmp_path / "traces").glob("*.json"))
+    assert "ab" in [name for name, *_ in task_manager.metrics.slowest_tasks()]
+
+def test_runs_share_the_worker_pool(task_manager):
+    task_manager.set_max_workers(2)
+    names = [f"t{i}" for i in range(5)]
+    for name in names:
+        task_manager.add_task(name, "sleep 0.2")
+    running = set()
+    peak = []
+
+    def on_event(event):
+        if event["type"] == "status":
+            if event["status"] == "task_status.running":
+                running.add(event["task"])
+                peak.append(len(running))
+            elif event["status"] != "task_status.waiting":
+                running.discard(event["task"])
+
+    results = asyncio.run(AsyncTaskManager(task_manager).run_tasks(names, on_event, max_parallel=5))
+    assert results == {name: 0 for name in names}
+    assert max(peak) <= 2
+
+def test_cancel_queued_async_run(task_manager):
+    task_manager.set_max_workers(1)
+    task_manager.add_task("slow", "sleep 0.5")
+    task_manager.add_task("queued", "echo queued")
+    runner = AsyncTaskManager(task_manager)
+
+    async def main():
+        events = []
+        slow = asyncio.ensure_future(runner.run_task("slow"))
+        queued = asyncio.ensure_future(runner.run_task("queued", collect(events)))
+        while "slow" not in task_manager.active_runs:
+            await asyncio.sleep(0.01)
+        assert task_manager.cancel_task("queued")
+        return await slow, await queued, events
+
+    slow, queued, events = asyncio.run(main())
+    assert (slow, queued) == (0, -1)
+    assert [event["status"] for event in events if event["type"] == "status"] == ["task_status.cancelled"]
+    assert not [event for event in events if event["type"] == "output"]
@@ -0,0 +1,59 @@
+from command_parser import DEFAULT_PAUSE, parse_command, plan_step, split_command
+
+def run_plan(plan, results):
+    """按 plan_step 执行计划，shell 步骤的退出码依次取自 results，返回执行过的步骤"""
+    executed = []
+    return_code = 0
+    index = 0
+    results = list(results)
+    while index < len(plan):
+        step, index = plan_step(plan, index, return_code)
+        if step is None:
+            continue
+        executed.append(step)
+        return_code = 0 if step[0] == "pause" else results.pop(0)
+    return executed
+
+def test_split_on_top_level_operators():
+    assert split_command("a && b || c; d") == [(None, "a"), ("&&", "b"), ("||", "c"), (";", "d")]
+    assert split_command("a\nb") == [(None, "a"), (";", "b")]
+
+def test_split_keeps_quoted_escaped_and_grouped_separators():
+    assert split_command("echo 'a; b' && echo \"c && d\"") == [(None, "echo 'a; b'"), ("&&", 'echo "c && d"')]
+    assert split_command(r"echo a\; b") == [(None, r"echo a\; b")]
+    assert split_command("(cd x; make) && echo ok") == [(None, "(cd x; make)"), ("&&", "echo ok")]
+    assert split_command(r'echo "a \" ; b"') == [(None, r'echo "a \" ; b"')]
+
+def test_split_windows_sequence_and_redirection():
+    assert split_command("dir & echo x", windows=True) == [(None, "dir"), ("&", "echo x")]
+    assert split_command("build 2>&1 & echo done", windows=True) == [(None, "build 2>&1"), ("&", "echo done")]
+    assert split_command("echo a ^& b", windows=True) == [(None, "echo a ^& b")]
+    # Windows 下单引号不是引号
+    assert split_command("echo 'a & b'", windows=True) == [(None, "echo 'a"), ("&", "b'")]
+
+def test_split_posix_redirection_is_not_a_separator():
+    assert split_command("make 2>&1 && echo ok") == [(None, "make 2>&1"), ("&&", "echo ok")]
+
+def test_split_drops_empty_segments():
+    assert split_command(" ; a ;; b ; ") == [(None, "a"), (";", "b")]
+    assert split_command("") == []
+
+def test_parse_pause():
+    assert parse_command("a && pause 2 && b") == ((None, "shell", "a"), ("&&", "pause", 2), ("&&", "shell", "b"))
+    assert parse_command("PAUSE") == ((None, "pause", DEFAULT_PAUSE),)
+    assert parse_command("pause x") == ((None, "pause", DEFAULT_PAUSE),)
+    # 带更多参数时不是内置的 pause
+    assert parse_command("pause 1 2") == ((None, "shell", "pause 1 2"),)
+
+def test_plan_merges_shell_segments_until_pause():
+    plan = parse_command("a && b; c && pause 1 || d")
+    assert run_plan(plan, [0, 0]) == [("shell", "a && b ; c"), ("pause", 1)]
+
+def test_plan_skips_by_exit_code():
+    plan = parse_command("pause 1 && a || b")
+    assert run_plan(plan, [0]) == [("pause", 1), ("shell", "a || b")]
+    plan = parse_command("a && pause 1 && b")
+    assert run_plan(plan, [1]) == [("shell", "a")]
+    plan = parse_command("a || pause 1")
+    assert run_plan(plan, [0]) == [("shell", "a")]
+    assert run_plan(plan, [1]) == [("shell", "a"), ("pause", 1)]
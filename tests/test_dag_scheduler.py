@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from dag_scheduler import DagScheduler
+
+def test_topological_order_is_stable():
+    scheduler = DagScheduler(["a", "b", "c", "d"], {"c": ["a", "b"], "d": ["c"]})
+    assert scheduler.topological_order() == ["a", "b", "c", "d"]
+
+@pytest.mark.parametrize("dependencies", [{"a": ["b"], "b": ["a"]}, {"a": ["missing"]}])
+def test_invalid_graph_is_rejected(dependencies):
+    with pytest.raises(ValueError):
+        DagScheduler(["a", "b"], dependencies)
+
+def test_independent_nodes_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run_node(node):
+        # 两个节点都开始后才能通过，串行执行时会超时失败
+        barrier.wait()
+        return 0
+
+    results = DagScheduler(["a", "b"], {}, max_workers=2).run(run_node)
+    assert {node: result["status"] for node, result in results.items()} == {"a": "completed", "b": "completed"}
+
+def test_failure_skips_only_downstream_nodes():
+    ran = []
+
+    def run_node(node):
+        ran.append(node)
+        return 1 if node == "a" else 0
+
+    scheduler = DagScheduler(["a", "b", "c", "d"], {"b": ["a"], "c": ["b"]}, max_workers=1)
+    results = scheduler.run(run_node)
+    assert results["a"]["status"] == "failed"
+    assert results["b"]["status"] == "skipped"
+    assert results["c"]["status"] == "skipped"
+    assert results["d"]["status"] == "completed"
+    assert sorted(ran) == ["a", "d"]
+
+def test_critical_path_follows_longest_chain():
+    def run_node(node):
+        time.sleep({"slow": 0.2, "fast": 0.01, "last": 0.01}[node])
+        return 0
+
+    scheduler = DagScheduler(["slow", "fast", "last"], {"last": ["slow", "fast"]}, max_workers=2)
+    path, seconds = scheduler.critical_path(scheduler.run(run_node))
+    assert path == ["slow", "last"]
+    assert seconds >= 0.2
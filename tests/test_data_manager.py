@@ -0,0 +1,51 @@
+import json
+
+from data_manager import DataManager
+
+def task(name):
+    return {"name": name, "command": f"echo {name}"}
+
+def test_edits_survive_reload(tmp_path):
+    tasks_file = str(tmp_path / "tasks.json")
+    dm = DataManager(tasks_file)
+    dm.put_task("a", task("a"))
+    dm.put_task("b", task("b"))
+    dm.delete_task("a")
+    dm.put_task("a", task("a"))
+    dm.flush()
+    # 删除后重新添加的任务排在最后
+    assert list(DataManager(tasks_file).load_tasks()) == ["b", "a"]
+
+def test_compact_merges_journal_into_snapshot(tmp_path):
+    tasks_file = str(tmp_path / "tasks.json")
+    dm = DataManager(tasks_file, compact_threshold=3)
+    for name in "abc":
+        dm.put_task(name, task(name))
+    dm.flush()
+    assert not (tmp_path / "tasks.json.journal").exists()
+    with open(tasks_file, encoding="utf-8") as f:
+        assert list(json.load(f)) == ["a", "b", "c"]
+
+def test_torn_journal_tail_does_not_hide_later_edits(tmp_path):
+    tasks_file = str(tmp_path / "tasks.json")
+    dm = DataManager(tasks_file)
+    dm.put_task("a", task("a"))
+    dm.flush()
+    # 模拟崩溃时只写了一半的日志行
+    with open(tasks_file + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "name": "torn", "ta')
+
+    dm = DataManager(tasks_file)
+    assert list(dm.load_tasks()) == ["a"]
+    dm.put_task("b", task("b"))
+    dm.put_task("c", task("c"))
+    dm.flush()
+    assert list(DataManager(tasks_file).load_tasks()) == ["a", "b", "c"]
+
+def test_entries_after_a_damaged_line_are_replayed(tmp_path):
+    tasks_file = str(tmp_path / "tasks.json")
+    DataManager(tasks_file)
+    with open(tasks_file + ".journal", "w", encoding="utf-8") as f:
+        f.write('{"op": "put", "name": "torn", "ta{"op": "put", "name": "b", "task": {}}\n')
+        f.write(json.dumps({"op": "put", "name": "c", "task": task("c")}) + "\n")
+    assert list(DataManager(tasks_file).load_tasks()) == ["c"]
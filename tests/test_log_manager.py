@@ -0,0 +1,131 @@
+import glob
+import gzip
+import os
+import threading
+import time
+
+from log_manager import LogManager
+
+def wait_for_archives(log_file, timeout=5):
+    """等待后台线程压缩完所有轮转出的日志段"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not [path for path in glob.glob(log_file + ".*") if not path.endswith(".gz")]:
+            break
+        time.sleep(0.05)
+    return sorted(glob.glob(log_file + ".*.gz"))
+
+def test_segments_never_exceed_max_bytes(tmp_path):
+    log_file = str(tmp_path / "execution.log")
+    log_manager = LogManager(log_file, max_bytes=20000, rotate_daily=False, flush_bytes=1024 * 1024, flush_interval=10)
+    # 一次写出的批次远大于 max_bytes，需要在批次中间切换日志段
+    log_manager.write_logs([f"line {i} " + "x" * 80 for i in range(1000)])
+    log_manager.close()
+
+    archives = wait_for_archives(log_file)
+    assert len(archives) >= 4
+    sizes = [len(gzip.open(archive).read()) for archive in archives] + [os.path.getsize(log_file)]
+    assert max(sizes) <= 20000
+
+    lines = []
+    for archive in archives:
+        lines.extend(gzip.open(archive).read().decode("utf-8").splitlines())
+    with open(log_file, encoding="utf-8") as f:
+        lines.extend(f.read().splitlines())
+    assert sum(1 for line in lines if line.startswith("[")) == 1000
+
+def test_header_only_segment_is_not_rotated(tmp_path):
+    log_file = str(tmp_path / "execution.log")
+    log_manager = LogManager(log_file, max_bytes=100, rotate_daily=False)
+    # 单条日志超过 max_bytes 时写入新建的日志段，不产生只有文件头的归档
+    log_manager.write_log("y" * 500)
+    log_manager.close()
+
+    assert wait_for_archives(log_file) == []
+    with open(log_file, encoding="utf-8") as f:
+        assert "y" * 500 in f.read()
+
+def test_reopened_header_only_log_is_not_rotated(tmp_path):
+    log_file = str(tmp_path / "execution.log")
+    LogManager(log_file).close()
+    log_manager = LogManager(log_file, max_bytes=100, rotate_daily=False)
+    log_manager.write_log("z" * 200)
+    log_manager.close()
+    assert wait_for_archives(log_file) == []
+
+def test_get_recent_logs_returns_last_lines(tmp_path):
+    log_manager = LogManager(str(tmp_path / "execution.log"))
+    log_manager.write_logs([f"message {i}" for i in range(50)])
+    recent = log_manager.get_recent_logs(3)
+    log_manager.close()
+    assert [line.split("] ", 1)[1].strip() for line in recent] == ["message 47", "message 48", "message 49"]
+
+def messages(lines):
+    return [line.split("] ", 1)[1].strip() for line in lines]
+
+def test_get_logs_pages_from_the_end(tmp_path):
+    log_file = str(tmp_path / "execution.log")
+    LogManager(log_file).close()
+    header = len(open(log_file, encoding="utf-8").read().splitlines())
+    log_manager = LogManager(log_file)
+    log_manager.write_logs([f"message {i}" for i in range(8)])
+    total = header + 8
+    assert messages(log_manager.get_logs(0, 3)) == ["message 5", "message 6", "message 7"]
+    assert messages(log_manager.get_logs(3, 3)) == ["message 2", "message 3", "message 4"]
+    assert len(log_manager.get_logs(total - 2, 5)) == 2
+    # offset 超出文件开头时返回空列表
+    assert log_manager.get_logs(total + 2, 5) == []
+    assert log_manager.get_logs(total, 5) == []
+    log_manager.close()
+
+def follow_in_background(log_manager):
+    lines = []
+    stop_event = threading.Event()
+
+    def run():
+        for line in log_manager.follow(poll_interval=0.02, stop_event=stop_event):
+            lines.append(line)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    time.sleep(0.1)
+    return lines, stop_event, thread
+
+def wait_for_message(lines, message, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(message in line for line in lines):
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_follow_continues_across_rotation(tmp_path):
+    log_manager = LogManager(str(tmp_path / "execution.log"), max_bytes=2000, rotate_daily=False)
+    lines, stop_event, thread = follow_in_background(log_manager)
+    # 每轮写入少于一个日志段，跟踪方在每轮之间最多遇到一次轮转
+    for start in range(0, 60, 10):
+        log_manager.write_logs([f"message {i} " + "x" * 40 for i in range(start, start + 10)])
+        log_manager.flush()
+        assert wait_for_message(lines, f"message {start + 9} ")
+    assert wait_for_archives(log_manager.log_file)
+    stop_event.set()
+    thread.join(5)
+    log_manager.close()
+    followed = [line for line in lines if "message" in line]
+    assert [line.split("message ", 1)[1].split(" ")[0] for line in followed] == [str(i) for i in range(60)]
+
+def test_follow_after_clear_logs(tmp_path):
+    log_manager = LogManager(str(tmp_path / "execution.log"))
+    log_manager.write_logs([f"old {i} " + "x" * 100 for i in range(20)])
+    lines, stop_event, thread = follow_in_background(log_manager)
+    log_manager.write_log("before clear")
+    log_manager.flush()
+    assert wait_for_message(lines, "before clear")
+    log_manager.clear_logs()
+    time.sleep(0.1)
+    log_manager.write_log("after clear")
+    log_manager.flush()
+    assert wait_for_message(lines, "after clear")
+    stop_event.set()
+    thread.join(5)
+    log_manager.close()
+    assert not any("old" in line for line in lines)
@@ -0,0 +1,33 @@
+from output_buffer import OutputBuffer, spill_path
+
+def test_byte_limit_counts_utf8_bytes():
+    output = OutputBuffer(max_lines=100, max_bytes=12)
+    output.append("中文")  # 6 字节
+    output.append("输出")
+    assert output.bytes == 12
+    output.append("a")
+    assert output.get_lines() == ["输出", "a"]
+    assert output.bytes == 7
+    assert output.dropped == 1
+
+def test_line_limit_keeps_latest_lines():
+    output = OutputBuffer(max_lines=2)
+    for line in ("1", "2", "3"):
+        output.append(line)
+    assert output.get_lines() == ["2", "3"]
+
+def test_spill_file_keeps_full_output(tmp_path):
+    path = tmp_path / "out" / "task.log"
+    output = OutputBuffer(max_lines=1, spill_file=str(path))
+    output.append("first")
+    output.append("second")
+    output.close()
+    assert path.read_text(encoding="utf-8") == "first\nsecond\n"
+
+def test_spill_path_removes_old_files(tmp_path):
+    for stamp in ("20240101-000000-001", "20240101-000000-002", "20240101-000000-003"):
+        (tmp_path / f"task-{stamp}.log").write_text("")
+    (tmp_path / "other-20240101-000000-001.log").write_text("")
+    spill_path(str(tmp_path), "task", keep=2)
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert names == ["other-20240101-000000-001.log", "task-20240101-000000-003.log"]
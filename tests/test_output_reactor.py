@@ -0,0 +1,55 @@
+import subprocess
+import threading
+
+from output_reactor import EventLoopOutputReactor, OutputReactor
+
+def collector():
+    lines = []
+    sizes = {"stdout": 0, "stderr": 0}
+    lock = threading.Lock()
+
+    def on_line(stream, line, timestamp):
+        with lock:
+            lines.append((stream, line))
+
+    def on_chunk(stream, size):
+        with lock:
+            sizes[stream] += size
+    return lines, sizes, on_line, on_chunk
+
+COMMAND = "printf 'a\\nb\\n'; printf 'err\\n' >&2; printf 'tail'"
+
+def test_selector_reactor_splits_lines():
+    lines, sizes, on_line, on_chunk = collector()
+    process = subprocess.Popen(COMMAND, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    watch = OutputReactor().watch(process, on_line, on_chunk)
+    process.wait()
+    assert watch.wait(5)
+    assert [line for line in lines if line[0] == "stdout"] == [("stdout", "a"), ("stdout", "b"), ("stdout", "tail")]
+    assert ("stderr", "err") in lines
+    assert sizes == {"stdout": 8, "stderr": 4}
+
+def test_event_loop_reactor_spawns_and_reads():
+    reactor = EventLoopOutputReactor()
+    lines, sizes, on_line, on_chunk = collector()
+    process, watch = reactor.spawn(COMMAND, on_line, on_chunk)
+    assert watch.wait(5)
+    assert watch.returncode == 0
+    assert process.pid
+    assert [line for line in lines if line[0] == "stdout"] == [("stdout", "a"), ("stdout", "b"), ("stdout", "tail")]
+    assert ("stderr", "err") in lines
+    assert sizes == {"stdout": 8, "stderr": 4}
+
+def test_event_loop_reactor_runs_many_processes():
+    reactor = EventLoopOutputReactor()
+    watches = []
+    results = []
+    for i in range(20):
+        lines, sizes, on_line, on_chunk = collector()
+        process, watch = reactor.spawn(f"echo {i}; exit {i % 3}", on_line, on_chunk)
+        watches.append(watch)
+        results.append(lines)
+    for watch in watches:
+        assert watch.wait(10)
+    assert [watch.returncode for watch in watches] == [i % 3 for i in range(20)]
+    assert results == [[("stdout", str(i))] for i in range(20)]
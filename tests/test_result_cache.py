@@ -0,0 +1,78 @@
+import pytest
+
+from result_cache import ResultCache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+def test_only_tasks_with_inputs_are_cacheable(cache):
+    assert not ResultCache.is_cacheable({"name": "a", "command": "make"})
+    assert cache.fingerprint({"name": "a", "command": "make"}) is None
+    assert ResultCache.is_cacheable({"name": "a", "command": "make", "env": ["MODE"]})
+
+def test_fingerprint_follows_inputs(cache, tmp_path, monkeypatch):
+    source = tmp_path / "src" / "main.c"
+    source.parent.mkdir()
+    source.write_text("int main;")
+    task = {"name": "build", "command": "make", "inputs": [str(tmp_path / "src")], "env": ["BUILD_MODE"]}
+    monkeypatch.setenv("BUILD_MODE", "debug")
+    first = cache.fingerprint(task)
+    assert cache.fingerprint(task) == first
+
+    source.write_text("int main(void);")
+    changed = cache.fingerprint(task)
+    assert changed != first
+
+    monkeypatch.setenv("BUILD_MODE", "release")
+    assert cache.fingerprint(task) != changed
+    monkeypatch.delenv("BUILD_MODE")
+    assert cache.fingerprint(task) != changed
+
+    monkeypatch.setenv("BUILD_MODE", "debug")
+    (tmp_path / "src" / "extra.c").write_text("")
+    assert cache.fingerprint(task) != changed
+    assert cache.fingerprint(dict(task, command="make all")) != cache.fingerprint(task)
+
+def test_file_digest_is_reused_across_instances(cache, tmp_path, monkeypatch):
+    source = tmp_path / "input.txt"
+    source.write_text("data")
+    task = {"name": "t", "command": "cat", "inputs": [str(source)]}
+    fingerprint = cache.fingerprint(task)
+    other = ResultCache(cache.cache_file)
+    # mtime 和大小未变化时不重新读取文件
+    monkeypatch.setattr("builtins.open", None)
+    assert other.fingerprint(task) == fingerprint
+    other.close()
+
+def test_get_and_put(cache):
+    assert cache.get("missing") is None
+    cache.put("f1", "task", 0, ["line 1", "行 2"])
+    result = cache.get("f1")
+    assert result["exit_code"] == 0
+    assert result["output"] == ["line 1", "行 2"]
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.put("a", "a", 0, [])
+    cache.put("b", "b", 0, [])
+    cache.get("a")
+    cache.put("c", "c", 0, [])
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    cache.close()
+
+def test_evicts_by_output_size(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), max_bytes=20)
+    cache.put("a", "a", 0, ["x" * 10])
+    cache.put("b", "b", 0, ["y" * 10])
+    assert cache.get("a") is None
+    assert cache.get("b")["output"] == ["y" * 10]
+    cache.close()
+
+def test_clear(cache):
+    cache.put("a", "a", 0, [])
+    cache.clear()
+    assert cache.get("a") is None
@@ -0,0 +1,31 @@
+from search_index import TaskSearchIndex
+
+def build(*tasks):
+    index = TaskSearchIndex()
+    index.rebuild({"name": name, "command": command} for name, command in tasks)
+    return index
+
+def test_ranking_prefers_exact_then_prefix_then_contains():
+    index = build(("deploy-web", "scp web"), ("web", "echo"), ("webpack", "npm run build"), ("build", "make web"))
+    assert index.search("web") == ["web", "webpack", "deploy-web", "build"]
+
+def test_fuzzy_match_tolerates_typos():
+    index = build(("deploy-staging", "echo"), ("backup", "echo"))
+    assert index.search("deploy-stagign") == ["deploy-staging"]
+
+def test_short_queries_scan_names_and_commands():
+    index = build(("a1", "echo x"), ("b2", "echo a"))
+    assert index.search("a") == ["a1", "b2"]
+
+def test_incremental_updates():
+    index = build(("old", "echo"))
+    index.add({"name": "new", "command": "echo"})
+    index.remove("old")
+    index.add({"name": "new", "command": "make release"})
+    assert index.search("old") == []
+    assert index.search("release") == ["new"]
+    assert len(index) == 1
+
+def test_empty_query_lists_in_insertion_order_with_limit():
+    index = build(("c", ""), ("a", ""), ("b", ""))
+    assert index.search("", limit=2) == ["c", "a"]
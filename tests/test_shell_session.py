@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from shell_session import ShellSession
+
+@pytest.fixture
+def session():
+    session = ShellSession()
+    yield session
+    session.close(1)
+
+def run(session, command, timeout=10):
+    """执行指令并返回 (退出码, 输出行)，超时视为失败"""
+    lines = []
+    result = []
+    thread = threading.Thread(target=lambda: result.append(session.run(command, lambda stream, line: lines.append((stream, line)))))
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    assert result, "command did not finish"
+    return result[0], lines
+
+def test_keeps_state_between_commands(session, tmp_path):
+    assert run(session, f"cd '{tmp_path}' && export GREETING=hi")[0] == 0
+    return_code, lines = run(session, 'echo "$PWD $GREETING"')
+    assert return_code == 0
+    assert ("stdout", f"{tmp_path} hi\n") in lines
+
+def test_returns_exit_code(session):
+    assert run(session, "false")[0] == 1
+    assert run(session, "(exit 7)")[0] == 7
+
+def test_output_bytes_exclude_marker_padding(session):
+    run(session, "true")
+    assert session.output_bytes == {"stdout": 0, "stderr": 0}
+    run(session, "echo abc; echo de >&2")
+    assert session.output_bytes == {"stdout": 4, "stderr": 3}
+    # 没有以换行结尾的输出不计入补充的换行
+    run(session, "printf abc")
+    assert session.output_bytes == {"stdout": 3, "stderr": 0}
+    run(session, "printf '中\\n\\n'")
+    assert session.output_bytes == {"stdout": 5, "stderr": 0}
+
+def test_single_quotes_in_command(session):
+    return_code, lines = run(session, "echo 'it'\\''s'")
+    assert return_code == 0
+    assert ("stdout", "it's\n") in lines
+
+def test_unterminated_quote_fails_without_hanging(session):
+    return_code, lines = run(session, "echo 'abc")
+    assert return_code != 0
+    assert any(stream == "stderr" for stream, line in lines)
+
+def test_unterminated_here_document_does_not_swallow_marker(session):
+    return_code, lines = run(session, "cat <<EOF\nabc")
+    assert return_code == 0
+    assert ("stdout", "abc\n") in lines
+    assert run(session, "echo next")[0] == 0
+
+def test_exit_reports_shell_status(session):
+    assert run(session, "exit 0")[0] == 0
+    assert session.closed
+    assert run(session, "echo after") == (-1, [])
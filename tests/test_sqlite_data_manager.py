@@ -0,0 +1,60 @@
+from data_manager import DataManager
+from sqlite_data_manager import SqliteDataManager
+from task_manager import TaskManager
+
+def make_library(tmp_path, count):
+    storage = SqliteDataManager(str(tmp_path / "tasks.db"))
+    storage.save_tasks({f"task-{i:04d}": {"name": f"task-{i:04d}", "command": f"echo module {i}"} for i in range(count)})
+    return storage
+
+def test_iteration_reads_names_without_caching(tmp_path):
+    storage = make_library(tmp_path, 3000)
+    tasks = storage.load_tasks()
+    names = list(tasks)
+    assert names == [f"task-{i:04d}" for i in range(3000)]
+    assert tasks.cache == {}
+    assert tasks["task-0005"]["command"] == "echo module 5"
+    assert list(tasks.cache) == ["task-0005"]
+
+def test_iter_task_names_pages_in_library_order(tmp_path):
+    storage = make_library(tmp_path, 5)
+    storage.delete_task("task-0002")
+    storage.put_task("new", {"name": "new", "command": "echo new"})
+    assert list(storage.iter_task_names(page=2)) == ["task-0000", "task-0001", "task-0003", "task-0004", "new"]
+
+def test_deleted_tasks_are_hidden_from_the_map(tmp_path):
+    tasks = make_library(tmp_path, 3).load_tasks()
+    del tasks["task-0001"]
+    assert list(tasks) == ["task-0000", "task-0002"]
+    assert "task-0001" not in tasks
+
+def test_task_manager_searches_in_storage(tmp_path, language_manager):
+    storage = make_library(tmp_path, 3000)
+    tm = TaskManager(storage, language_manager)
+    assert tm.search_task_names("task-012")[:3] == ["task-0120", "task-0121", "task-0122"]
+    assert "task-2999" in tm.search_task_names("module 2999")
+    # 搜索不建立内存索引，也不把任务库读入内存
+    assert tm.search_index is None
+    assert len(tm.tasks.cache) == 0
+    tm.shutdown()
+
+def test_name_matches_rank_the_same_on_both_backends(tmp_path, language_manager):
+    library = {
+        "build-x": {"name": "build-x", "command": "make x"},
+        "rebuild": {"name": "rebuild", "command": "make clean all"},
+        "Build": {"name": "Build", "command": "make"},
+        "BUILD-all": {"name": "BUILD-all", "command": "make all"},
+    }
+    storage = SqliteDataManager(str(tmp_path / "tasks.db"))
+    storage.save_tasks(library)
+    json_storage = DataManager(str(tmp_path / "tasks.json"), language_manager)
+    json_storage.save_tasks(library)
+    sqlite_tm = TaskManager(storage, language_manager)
+    json_tm = TaskManager(json_storage, language_manager)
+    expected = ["Build", "build-x", "BUILD-all", "rebuild"]
+    assert sqlite_tm.search_task_names("build") == expected
+    assert json_tm.search_task_names("build") == expected
+    # 内存索引另有模糊匹配，只比较名称匹配的部分
+    assert sqlite_tm.search_task_names("BUILD-") == json_tm.search_task_names("BUILD-")[:2] == ["build-x", "BUILD-all"]
+    sqlite_tm.shutdown()
+    json_tm.shutdown()
@@ -0,0 +1,227 @@
+import threading
+import time
+
+from data_manager import DataManager
+from task_manager import TaskManager
+
+def noop(*args):
+    pass
+
+def test_run_tasks_and_wait_returns_exit_codes(task_manager):
+    task_manager.add_task("ok", "exit 0")
+    task_manager.add_task("bad", "exit 3")
+    results = task_manager.run_tasks_and_wait(["ok", "bad", "missing"], noop, noop)
+    assert results == {"ok": 0, "bad": 3, "missing": None}
+
+def test_set_max_workers_during_batch(task_manager):
+    task_manager.set_max_workers(1)
+    for i in range(4):
+        task_manager.add_task(f"t{i}", "sleep 0.1")
+    started = threading.Event()
+
+    def status_callback(task_name, status):
+        if status == "task_status.running":
+            started.set()
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(
+        task_manager.run_tasks_and_wait([f"t{i}" for i in range(4)], status_callback, noop, max_parallel=1)))
+    thread.start()
+    assert started.wait(5)
+    # 批次执行中更换线程池，之后的任务仍然提交成功
+    task_manager.set_max_workers(2)
+    thread.join(10)
+    assert result == {f"t{i}": 0 for i in range(4)}
+    assert not task_manager.batch_stops
+
+def test_task_outputs_are_bounded(task_manager):
+    task_manager.output_tasks = 2
+    for i in range(3):
+        task_manager.add_task(f"t{i}", f"echo {i}")
+    task_manager.run_tasks_and_wait(["t0", "t1", "t2"], noop, noop, max_parallel=1)
+    assert list(task_manager.task_outputs) == ["t1", "t2"]
+    assert task_manager.get_task_output("t0") == []
+    assert "2" in task_manager.get_task_output("t2")
+    task_manager.delete_task("t2")
+    assert "t2" not in task_manager.task_outputs
+
+def test_session_output_bytes(task_manager):
+    task_manager.add_task("a", "echo abc")
+    task_manager.add_task("b", "true")
+    task_manager.add_aggregate("ab", [{"task": "a"}, {"task": "b"}], session=True)
+    assert task_manager.run_tasks_and_wait(["ab"], noop, noop) == {"ab": 0}
+    _, counters = task_manager.metrics.summary()
+    totals = {labels["stream"]: value for name, labels, value in counters if name == "output_bytes_total"}
+    assert totals == {"stdout": 4, "stderr": 0}
+
+def test_force_ignores_result_cache_for_one_run(task_manager, tmp_path):
+    source = tmp_path / "input.txt"
+    source.write_text("a")
+    runs = tmp_path / "runs.txt"
+    task_manager.cache_file = str(tmp_path / "cache.db")
+    task_manager.add_task("build", f"echo x >> '{runs}'")
+    task_manager.update_task("build", dict(task_manager.get_task("build"), inputs=[str(source)]))
+    task_manager.add_aggregate("all", [{"task": "build"}])
+
+    def run(name, force=False):
+        assert task_manager.run_tasks_and_wait([name], noop, noop, force=force) == {name: 0}
+        return len(runs.read_text().splitlines())
+
+    assert run("build") == 1
+    assert run("build") == 1
+    assert run("build", force=True) == 2
+    assert run("all") == 2
+    assert run("all", force=True) == 3
+    # 强制执行只影响当次执行，之后仍然使用缓存
+    assert run("build") == 3
+    assert task_manager.use_result_cache
+
+def test_session_step_exit_ends_session(task_manager, language_manager):
+    task_manager.add_task("quit", "exit 0")
+    task_manager.add_task("after", "echo after")
+    task_manager.add_aggregate("both", [{"task": "quit"}, {"task": "after", "depends_on": ["quit"]}], session=True)
+    task_manager.log_manager = FakeLogManager()
+    logs = []
+    assert task_manager.run_tasks_and_wait(["both"], noop, logs.append) == {"both": -1}
+    assert language_manager.get_text("messages.session_ended").format("echo after") in logs
+    assert "after" not in logs
+    spans = {span["name"]: span["exit_code"] for span in task_manager.log_manager.runs[-1]["spans"]}
+    assert spans == {"quit": 0, "after": -1}
+
+class FakeLogManager:
+    def __init__(self):
+        self.runs = []
+
+    def record_run(self, record):
+        self.runs.append(record)
+
+def test_cache_hit_replays_output_and_records_up_to_date(task_manager, tmp_path):
+    source = tmp_path / "input.txt"
+    source.write_text("a")
+    task_manager.cache_file = str(tmp_path / "cache.db")
+    task_manager.log_manager = FakeLogManager()
+    task_manager.add_task("build", "echo built")
+    task_manager.update_task("build", dict(task_manager.get_task("build"), inputs=[str(source)]))
+
+    def run():
+        statuses, lines = [], []
+        task_manager.run_tasks_and_wait(["build"], lambda name, status: statuses.append(status), lines.append)
+        return statuses, lines
+
+    statuses, lines = run()
+    assert statuses[-1] == "task_status.completed"
+    statuses, lines = run()
+    assert statuses[-1] == "task_status.up_to_date"
+    assert "built" in lines
+    assert "built" in task_manager.get_task_output("build")
+    assert [run["status"] for run in task_manager.log_manager.runs] == ["completed", "up_to_date"]
+
+def test_traces_only_for_multi_task_batches_and_aggregates(task_manager, tmp_path, language_manager):
+    traces = tmp_path / "traces"
+    task_manager.trace_dir = str(traces)
+    task_manager.add_task("a", "echo a")
+    task_manager.add_task("b", "echo b")
+    task_manager.add_aggregate("ab", [{"task": "a"}, {"task": "b"}])
+    saved = language_manager.get_text("messages.trace_saved").split("{")[0]
+
+    lines = []
+    task_manager.run_tasks_and_wait(["a"], noop, lines.append)
+    assert not traces.exists()
+    assert not [line for line in lines if line.startswith(saved)]
+
+    task_manager.run_tasks_and_wait(["a", "b"], noop, lines.append)
+    assert len(list(traces.glob("batch-*.json"))) == 1
+    task_manager.run_tasks_and_wait(["ab"], noop, lines.append)
+    assert len(list(traces.glob("ab-*.json"))) == 1
+    assert len([line for line in lines if line.startswith(saved)]) == 2
+
+def collect_statuses():
+    statuses = {}
+
+    def status_callback(task_name, status):
+        statuses.setdefault(task_name, []).append(status)
+    return statuses, status_callback
+
+def test_cancel_right_after_run_task(task_manager, monkeypatch):
+    new_output = task_manager._new_output
+
+    def slow_new_output(task_name):
+        time.sleep(0.1)
+        return new_output(task_name)
+    monkeypatch.setattr(task_manager, "_new_output", slow_new_output)
+    task_manager.add_task("slow", "sleep 2")
+    statuses, status_callback = collect_statuses()
+    done = threading.Event()
+
+    def on_status(task_name, status):
+        status_callback(task_name, status)
+        if status in ("task_status.cancelled", "task_status.completed"):
+            done.set()
+
+    start = time.monotonic()
+    task_manager.run_task("slow", on_status, noop)
+    assert task_manager.cancel_task("slow")
+    assert done.wait(5)
+    assert time.monotonic() - start < 1.5
+    assert statuses["slow"][-1] == "task_status.cancelled"
+
+def test_cancel_queued_task(task_manager):
+    task_manager.add_task("first", "sleep 0.3")
+    task_manager.add_task("second", "echo second")
+    statuses, status_callback = collect_statuses()
+    cancelled = []
+
+    def on_status(task_name, status):
+        status_callback(task_name, status)
+        if task_name == "first" and status == "task_status.running":
+            cancelled.append(task_manager.cancel_task("second"))
+
+    results = task_manager.run_tasks_and_wait(["first", "second"], on_status, noop, max_parallel=1)
+    assert cancelled == [True]
+    assert results == {"first": 0, "second": -1}
+    assert statuses["second"] == ["task_status.cancelled"]
+    assert not task_manager.queued_tasks and not task_manager.cancelled_tasks
+    assert not task_manager.cancel_task("second")
+
+def test_task_timeout(task_manager):
+    task_manager.add_task("slow", "sleep 5")
+    statuses, status_callback = collect_statuses()
+    start = time.monotonic()
+    results = task_manager.run_tasks_and_wait(["slow"], status_callback, noop, timeout=0.3)
+    assert time.monotonic() - start < 3
+    assert results["slow"] != 0
+    assert statuses["slow"][-1] == "task_status.timeout"
+
+def test_batch_timeout_skips_remaining_tasks(task_manager):
+    task_manager.add_task("slow", "sleep 5")
+    task_manager.add_task("next", "echo next")
+    statuses, status_callback = collect_statuses()
+    start = time.monotonic()
+    results = task_manager.run_tasks_and_wait(["slow", "next"], status_callback, noop, max_parallel=1, batch_timeout=0.3)
+    assert time.monotonic() - start < 3
+    assert statuses["slow"][-1] == "task_status.timeout"
+    assert results["next"] is None
+    assert "next" not in statuses
+    assert not task_manager.queued_tasks
+
+def test_add_before_deferred_load_keeps_stored_task(tmp_path, language_manager):
+    tasks_file = str(tmp_path / "tasks.json")
+    stored = TaskManager(DataManager(tasks_file, language_manager), language_manager)
+    stored.add_task("deploy", "./deploy.sh --prod")
+    stored.data_manager.flush()
+
+    deferred = TaskManager(DataManager(tasks_file, language_manager), language_manager, load_tasks=False)
+    assert not deferred.add_task("deploy", "echo new")
+    assert deferred.add_task("other", "echo other")
+    deferred.reload_tasks()
+    assert deferred.get_task("deploy")["command"] == "./deploy.sh --prod"
+    assert deferred.get_task("other")["command"] == "echo other"
+
+def test_event_loop_reactor_path(task_manager):
+    # Windows 下由事件循环反应器启动进程；该路径不依赖 IOCP，可在任意平台上执行
+    task_manager.platform = "windows"
+    task_manager.add_task("mixed", "echo out; echo err 1>&2; exit 3")
+    lines = []
+    assert task_manager.run_tasks_and_wait(["mixed"], noop, lines.append) == {"mixed": 3}
+    assert "out" in lines
+    assert [line for line in lines if getattr(line, "stream", None) == "stderr"][0].line == "err"
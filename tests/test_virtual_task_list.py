@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+from virtual_task_list import VirtualTaskList
+
+ROW_HEIGHT = 20
+
+class FakeTree:
+    """模拟 Treeview 的行、选中状态和单击行为，不需要显示环境"""
+    def __init__(self, height=10):
+        self.height = height
+        self.values = {}
+        self.order = []
+        self.detached = set()
+        self.current = []
+        self.focused = ""
+        self.counter = 0
+
+    def cget(self, option):
+        return self.height
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def insert(self, parent, index, values=()):
+        self.counter += 1
+        item = f"I{self.counter}"
+        self.values[item] = values
+        self.order.append(item)
+        return item
+
+    def item(self, item, values=None):
+        if values is not None:
+            self.values[item] = values
+        return {"values": self.values[item]}
+
+    def move(self, item, parent, index):
+        self.detached.discard(item)
+        self.order.remove(item)
+        self.order.insert(index, item)
+
+    def detach(self, item):
+        self.detached.add(item)
+
+    def delete(self, item):
+        self.order.remove(item)
+
+    def selection_set(self, items):
+        self.current = list(items)
+
+    def selection(self):
+        return tuple(self.current)
+
+    def identify_row(self, y):
+        rows = [item for item in self.order if item not in self.detached]
+        index = y // ROW_HEIGHT
+        return rows[index] if index < len(rows) else ""
+
+    def focus(self, item=None):
+        if item is not None:
+            self.focused = item
+        return self.focused
+
+    def bbox(self, item):
+        return None
+
+class FakeScrollbar:
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, first, last):
+        pass
+
+def click(task_list, tree, name, ctrl=False):
+    """按 Treeview 的类绑定行为单击可见行：普通单击只选中该行，Ctrl 单击切换该行"""
+    item = task_list.visible[name]
+    event = SimpleNamespace(y=tree.order.index(item) * ROW_HEIGHT, state=0x0004 if ctrl else 0)
+    task_list._on_click(event)
+    if ctrl:
+        tree.current = [i for i in tree.current if i != item] if item in tree.current else tree.current + [item]
+    else:
+        tree.current = [item]
+    task_list._on_select(None)
+
+def make_list(count=50):
+    tree = FakeTree()
+    task_list = VirtualTaskList(tree, FakeScrollbar(), lambda name: (name,))
+    task_list.set_names([f"t{i}" for i in range(count)])
+    return task_list, tree
+
+def test_only_visible_rows_exist():
+    task_list, tree = make_list(1000)
+    assert len(tree.values) == 10
+    task_list.scroll(500)
+    assert set(task_list.visible) == {f"t{i}" for i in range(500, 510)}
+
+def test_plain_click_replaces_selection_across_scroll():
+    task_list, tree = make_list()
+    click(task_list, tree, "t0")
+    task_list.scroll(20)
+    click(task_list, tree, "t22")
+    assert task_list.selected_names() == ["t22"]
+
+def test_ctrl_click_extends_selection_across_scroll():
+    task_list, tree = make_list()
+    click(task_list, tree, "t0")
+    task_list.scroll(20)
+    click(task_list, tree, "t22", ctrl=True)
+    assert task_list.selected_names() == ["t0", "t22"]
+    # 滚动回去后选中行仍然显示为选中
+    task_list.scroll(-20)
+    assert task_list.visible["t0"] in tree.selection()
+
+def test_selection_is_kept_for_remaining_names_after_filter():
+    task_list, tree = make_list()
+    click(task_list, tree, "t1")
+    task_list.set_names(["t1", "t2"])
+    assert task_list.selected_names() == ["t1"]
+    task_list.set_names(["t2"])
+    assert task_list.selected_names() == []
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+
+class BatchTrace:
+    """收集一次批量执行（或一次聚合任务执行）的时间线，写出 Chrome trace-event 格式的 JSON
+
+    生成的文件可在 chrome://tracing 或 https://ui.perfetto.dev 中打开。每个执行线程
+    是一条轨道：任务、聚合任务的步骤、子命令（即子进程的生命周期）和暂停显示为嵌套的
+    区间，任务在批次队列中的等待时间显示在单独的异步轨道上。
+    """
+    def __init__(self, name):
+        self.name = name
+        self.start_time = time.time()
+        self.runs = []
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def add_run(self, record):
+        """添加一次任务执行的记录（_RunRecord.to_dict 的结果）"""
+        with self.lock:
+            self.runs.append(record)
+
+    def add_span(self, name, start_time, end_time, category="batch", args=None):
+        """添加批次本身的区间（例如整个批次、任务之间的暂停），记录在当前线程的轨道上"""
+        thread = threading.current_thread()
+        with self.lock:
+            self.spans.append({
+                "name": name, "cat": category, "start_time": start_time, "end_time": end_time,
+                "thread": threading.get_ident(), "thread_name": thread.name, "args": args or {}
+            })
+
+    def to_events(self):
+        """生成 trace 事件列表，时间为相对批次开始的微秒数"""
+        pid = os.getpid()
+        lanes = {}
+        events = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": f"CmdManager {self.name}"}}]
+
+        def tid(ident, name):
+            if ident not in lanes:
+                lanes[ident] = len(lanes) + 1
+                events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": lanes[ident], "args": {"name": name}})
+                events.append({"ph": "M", "name": "thread_sort_index", "pid": pid, "tid": lanes[ident], "args": {"sort_index": lanes[ident]}})
+            return lanes[ident]
+
+        def ts(value):
+            return round((value - self.start_time) * 1000000, 3)
+
+        def span(name, category, start_time, end_time, ident, thread_name, args):
+            events.append({
+                "ph": "X", "name": name, "cat": category, "pid": pid, "tid": tid(ident, thread_name),
+                "ts": ts(start_time), "dur": round(max(0, end_time - start_time) * 1000000, 3), "args": args
+            })
+
+        with self.lock:
+            spans = list(self.spans)
+            runs = list(self.runs)
+
+        for item in spans:
+            span(item["name"], item["cat"], item["start_time"], item["end_time"], item["thread"], item["thread_name"], item["args"])
+
+        for index, run in enumerate(runs):
+            task_name = run["task_name"]
+            if run.get("queued_at") is not None:
+                # 排队时间之间会相互重叠，使用异步事件显示在单独的轨道上
+                queue = {"cat": "queue", "name": "queue wait", "id": index, "pid": pid, "tid": 0, "args": {"task": task_name}}
+                events.append(dict(queue, ph="b", ts=ts(run["queued_at"])))
+                events.append(dict(queue, ph="e", ts=ts(run["start_time"])))
+            span(task_name, "task", run["start_time"], run["end_time"], run.get("thread"), run.get("thread_name", ""), {
+                "status": run["status"],
+                "exit_code": run["exit_code"],
+                "stdout_bytes": run["stdout_bytes"],
+                "stderr_bytes": run["stderr_bytes"],
+                "output_file": run.get("output_file")
+            })
+            for item in run.get("spans", []):
+                span(item["name"], "step", item["start_time"], item["end_time"], item["thread"], item["thread_name"],
+                     {"task": task_name, "exit_code": item["exit_code"]})
+            for step in run.get("steps", []):
+                span(step["command"], step.get("kind", "command"), step["start_time"], step["end_time"],
+                     step.get("thread"), step.get("thread_name", ""),
+                     {"task": task_name, "command": step["command"], "exit_code": step["exit_code"]})
+        return events
+
+    def write(self, path):
+        """写出 trace 文件"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "traceEvents": self.to_events(),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "name": self.name,
+                "start_time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.start_time))
+            }
+        }
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
@@ -0,0 +1,169 @@
+import sys
+
+# 扩展选择（Shift/Ctrl，macOS 下还有 Command）的事件状态位
+EXTEND_MASK = 0x0001 | 0x0004 | (0x0008 if sys.platform == "darwin" else 0)
+
+class VirtualTaskList:
+    """虚拟化任务列表：Treeview 中只保留可见区域的行，滚动时复用这些行显示模型中的任务
+
+    names 为当前要显示的任务名（已按搜索/常用过滤），row_values(name)
+    返回该任务行的显示内容。选中状态按任务名保存，滚动后依然有效。
+    """
+    def __init__(self, tree, scrollbar, row_values):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.names = []
+        self.offset = 0
+        self.pool = []
+        self.visible = {}  # 可见任务名 -> 行 id
+        self.item_names = {}  # 行 id -> 可见任务名
+        self.selected = set()
+        self.rows = int(tree.cget("height")) or 15
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        tree.bind("<ButtonPress-1>", self._on_click, add="+")
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        tree.bind("<Button-5>", lambda event: self.scroll(3))
+        tree.bind("<Up>", lambda event: self._move_focus(-1, event))
+        tree.bind("<Down>", lambda event: self._move_focus(1, event))
+        tree.bind("<Prior>", lambda event: self.scroll(-self.rows))
+        tree.bind("<Next>", lambda event: self.scroll(self.rows))
+
+    def set_names(self, names):
+        """替换要显示的任务列表"""
+        self.names = list(names)
+        kept = set(self.names)
+        self.selected &= kept
+        self.render()
+
+    def name_of(self, item):
+        """获取行对应的任务名"""
+        return self.item_names.get(item)
+
+    def refresh_name(self, name):
+        """任务显示内容变化时，只在其可见时更新对应行"""
+        item = self.visible.get(name)
+        if item is not None:
+            self.tree.item(item, values=self.row_values(name))
+
+    def selected_names(self):
+        """按显示顺序返回选中的任务名"""
+        return [name for name in self.names if name in self.selected]
+
+    def scroll(self, delta):
+        self.offset += delta
+        self.render()
+        return "break"
+
+    def scroll_to(self, name):
+        """滚动使指定任务可见"""
+        try:
+            index = self.names.index(name)
+        except ValueError:
+            return
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.rows:
+            self.offset = index - self.rows + 1
+        self.render()
+
+    def yview(self, *args):
+        """滚动条回调"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = int(round(float(args[1]) * len(self.names)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.offset += amount * self.rows if args[2] == "pages" else amount
+        self.render()
+
+    def render(self):
+        """把模型中 offset 开始的一屏任务填充到复用的行中"""
+        self.offset = max(0, min(self.offset, len(self.names) - self.rows))
+        while len(self.pool) < self.rows:
+            self.pool.append(self.tree.insert("", "end", values=()))
+        while len(self.pool) > self.rows:
+            self.tree.delete(self.pool.pop())
+
+        self.visible = {}
+        self.item_names = {}
+        selection = []
+        for index, item in enumerate(self.pool):
+            position = self.offset + index
+            if position < len(self.names):
+                name = self.names[position]
+                self.visible[name] = item
+                self.item_names[item] = name
+                self.tree.item(item, values=self.row_values(name))
+                self.tree.move(item, "", index)
+                if name in self.selected:
+                    selection.append(item)
+            else:
+                self.tree.detach(item)
+        self.tree.selection_set(selection)
+
+        if self.names:
+            first = self.offset / len(self.names)
+            last = min(1.0, (self.offset + self.rows) / len(self.names))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def _on_click(self, event):
+        """不带 Shift/Ctrl 的单击只选中被点击的任务，同时取消已滚出可见区域的选中项
+
+        Treeview 自身的类绑定在此之后执行，可见行的选中状态再由 _on_select 同步。
+        """
+        if event.state & EXTEND_MASK:
+            return
+        name = self.item_names.get(self.tree.identify_row(event.y))
+        if name is not None:
+            self.selected = {name}
+
+    def _on_select(self, event):
+        """把可见行的选中状态同步到按任务名保存的选中集合"""
+        current = set(self.tree.selection())
+        for name, item in self.visible.items():
+            if item in current:
+                self.selected.add(name)
+            else:
+                self.selected.discard(name)
+
+    def _on_configure(self, event):
+        """窗口大小变化时按行高重新计算可见行数"""
+        row_height, header_height = 20, 25
+        if self.visible:
+            bbox = self.tree.bbox(next(iter(self.visible.values())))
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        rows = max(1, (event.height - header_height) // max(1, row_height))
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def _on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _move_focus(self, delta, event=None):
+        """方向键选中上一个/下一个任务，移出可见区域时滚动列表"""
+        focus_name = self.name_of(self.tree.focus())
+        if focus_name is None:
+            return None
+        index = self.names.index(focus_name) + delta
+        if not 0 <= index < len(self.names):
+            return "break"
+        target = self.names[index]
+        if target in self.visible:
+            # 可见范围内由 Treeview 移动选中行；不带 Shift 时同样取消不可见的选中项
+            if event is None or not event.state & EXTEND_MASK:
+                self.selected = {target}
+            return None
+        self.selected = {target}
+        self.scroll_to(target)
+        self.tree.focus(self.visible[target])
+        return "break"